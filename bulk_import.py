@@ -0,0 +1,32 @@
+"""Chunked validation shared by the to-do and contact bulk imports."""
+import itertools
+
+# Only the first few rejected records are kept so memory stays flat on huge files
+MAX_REPORTED_ERRORS = 20
+
+
+def new_report():
+    """Empty import report: imported and rejected counts plus the first error messages"""
+    return {"imported": 0, "rejected": 0, "errors": []}
+
+
+def validated_chunks(records, validate, report, chunk_size=1000):
+    """Validate streamed (line, record) pairs chunk by chunk, counting rejects in report
+
+    validate(record) returns the normalized record or raises ValueError with the reason.
+    Records are only read as chunks are pulled, so a caller inserting the chunks inside a
+    transaction never holds the whole file in memory.
+    """
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        valid = []
+        for line_number, record in chunk:
+            try:
+                valid.append(validate(record))
+            except ValueError as error:
+                report["rejected"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append(f"line {line_number}: {error}")
+        yield valid
@@ -1,17 +1,34 @@
 import tkinter as tk
-from tkinter import messagebox, font
-import pickle
+from tkinter import ttk, messagebox, filedialog, font
 import hashlib
+import threading
 from datetime import datetime
+import perf_monitor
+from contact_store import ContactStore, name_key, phone_digits, check_contact
+from contact_index import TrigramIndex, FuzzyIndex, PhoneIndex, SEARCH_FIELDS
+import contact_transfer
+
+# Pause in typing, in milliseconds, before the search results are redrawn
+SEARCH_DELAY_MS = 150
+# Queries with no letters and at least this many digits also match phone numbers by digits alone
+PHONE_QUERY_DIGITS = 3
+TRANSFER_FILETYPES = [("vCard files", "*.vcf"), ("CSV files", "*.csv"), ("All files", "*.*")]
 
 class PersonalContactManager:
     def __init__(self):
         self.master = tk.Tk()
         self.initialize_application()
+        self.store = ContactStore()
         self.contact_database = self.retrieve_contact_data()
+        self.rebuild_name_index()
+        self.search_job = None
+        self.index_generation = 0
         self.currently_selected = None
+        self.displayed_ids = []   # contact id behind each listbox row, in row order
         self.setup_user_interface()
         self.populate_contact_display()
+        self.rebuild_search_indexes()
+        perf_monitor.start(self.master, "contacts")
     
     def initialize_application(self):
         """Setup main application window properties"""
@@ -33,20 +50,63 @@ class PersonalContactManager:
         self.entry_font = font.Font(family="Segoe UI", size=10)
     
     def retrieve_contact_data(self):
-        """Load contact information from storage file"""
-        storage_file = "personal_contacts.pkl"
-        try:
-            with open(storage_file, 'rb') as file:
-                return pickle.load(file)
-        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
-            return {}
+        """Load contact information from the contact store"""
+        return self.store.load_all()
+    
+    def rebuild_name_index(self):
+        """Map each casefolded name to its contact id for constant-time duplicate checks"""
+        self.name_index = {name_key(contact_info["name"]): contact_id
+                           for contact_id, contact_info in self.contact_database.items()}
+    
+    def rebuild_search_indexes(self):
+        """Build the search indexes on a worker thread; searches scan every contact until then"""
+        # Building takes seconds on large books, so it must not hold up the window
+        self.indexes_ready = False
+        self.unindexed = set()   # contacts changed while the build runs, replayed on install
+        self.index_generation += 1
+        generation = self.index_generation
+        contacts = dict(self.contact_database)
+        
+        def build():
+            indexes = (TrigramIndex(), FuzzyIndex(), PhoneIndex())
+            for index in indexes:
+                index.rebuild(contacts)
+            self.master.after(0, self.install_search_indexes, generation, indexes)
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    def install_search_indexes(self, generation, indexes):
+        """Switch searches over to freshly built indexes, unless a newer build was started"""
+        if generation != self.index_generation:
+            return
+        self.search_index, self.fuzzy_index, self.phone_index = indexes
+        self.indexes_ready = True
+        for contact_id in self.unindexed:
+            self.index_contact(contact_id)
+        self.unindexed = set()
+        if self.search_input.get():
+            self.perform_search()
     
-    def persist_contact_data(self):
-        """Save contact information to storage file"""
-        storage_file = "personal_contacts.pkl"
+    def index_contact(self, contact_id):
+        """Bring the search indexes up to date with one created, changed or deleted contact"""
+        if not self.indexes_ready:
+            self.unindexed.add(contact_id)
+            return
+        contact_info = self.contact_database.get(contact_id)
+        for index in (self.search_index, self.fuzzy_index, self.phone_index):
+            if contact_info is None:
+                index.remove(contact_id)
+            else:
+                index.add(contact_id, contact_info)
+    
+    @perf_monitor.timed("storage.persist")
+    def persist_contact_data(self, contact_id):
+        """Write one created, changed or deleted contact to the contact store"""
         try:
-            with open(storage_file, 'wb') as file:
-                pickle.dump(self.contact_database, file)
+            if contact_id in self.contact_database:
+                self.store.save(contact_id, self.contact_database[contact_id])
+            else:
+                self.store.delete(contact_id)
             return True
         except Exception as error:
             messagebox.showerror("Storage Error", f"Unable to save data: {error}")
@@ -85,11 +145,19 @@ class PersonalContactManager:
         search_label.pack(side=tk.LEFT)
         
         self.search_input = tk.StringVar()
-        self.search_input.trace("w", self.perform_search)
+        self.search_input.trace("w", self.schedule_search)
         search_field = tk.Entry(search_section, textvariable=self.search_input, 
                                font=self.entry_font, bg="#ffffff", fg="#000000", width=20)
         search_field.pack(side=tk.LEFT, padx=(8, 0), fill=tk.X, expand=True)
         
+        # Typo-tolerant mode: closest names and emails first instead of exact substrings
+        self.fuzzy_search = tk.BooleanVar()
+        fuzzy_toggle = tk.Checkbutton(search_section, text="Fuzzy", variable=self.fuzzy_search,
+                                      command=self.perform_search, bg="#0f3460", fg="#ffffff",
+                                      selectcolor="#0f3460", activebackground="#0f3460",
+                                      font=self.entry_font)
+        fuzzy_toggle.pack(side=tk.LEFT, padx=(8, 0))
+        
         # Contact list display
         list_container = tk.Frame(listing_panel, bg="#0f3460")
         list_container.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
@@ -189,6 +257,21 @@ class PersonalContactManager:
                                  command=self.execute_clear, **button_style)
         modify_button.grid(row=1, column=1, padx=8, pady=8)
         
+        self.import_button = tk.Button(button_section, text="IMPORT", 
+                                      bg="#17a2b8", fg="#ffffff", activebackground="#138496",
+                                      command=self.import_contacts, **button_style)
+        self.import_button.grid(row=2, column=0, padx=8, pady=8)
+        # Disabled while an import writes, so no other change interleaves with its transaction
+        self.editing_buttons = (create_button, update_button, delete_button, self.import_button)
+        
+        export_button = tk.Button(button_section, text="EXPORT", 
+                                 bg="#17a2b8", fg="#ffffff", activebackground="#138496",
+                                 command=self.export_contacts, **button_style)
+        export_button.grid(row=2, column=1, padx=8, pady=8)
+        
+        # Shown only while an import runs
+        self.import_progress = ttk.Progressbar(entry_panel, mode="determinate", maximum=1.0)
+        
         button_section.columnconfigure(0, weight=1)
         button_section.columnconfigure(1, weight=1)
     
@@ -200,27 +283,11 @@ class PersonalContactManager:
     
     def validate_contact_data(self, name, phone, email):
         """Verify that contact information is valid"""
-        if not name.strip():
-            messagebox.showerror("Input Error", "Contact name cannot be empty!")
-            return False
-        
-        if not phone.strip():
-            messagebox.showerror("Input Error", "Phone number is required!")
-            return False
-        
-        if not email.strip():
-            messagebox.showerror("Input Error", "Email address is required!")
-            return False
-        
-        # Email format validation
-        if "@" not in email or email.count("@") != 1 or "." not in email.split("@")[1]:
-            messagebox.showerror("Format Error", "Invalid email address format!")
-            return False
-        
-        # Phone number validation
-        digits_only = ''.join(filter(str.isdigit, phone))
-        if len(digits_only) < 10:
-            messagebox.showerror("Format Error", "Phone number needs at least 10 digits!")
+        # Same rules as file imports, which report problems instead of showing them
+        try:
+            check_contact(name, phone, email)
+        except ValueError as error:
+            messagebox.showerror("Input Error", str(error))
             return False
         
         return True
@@ -236,10 +303,9 @@ class PersonalContactManager:
             return
         
         # Check for duplicate names
-        for contact_info in self.contact_database.values():
-            if contact_info["name"].lower() == name.lower():
-                messagebox.showerror("Duplicate Error", "Contact with this name already exists!")
-                return
+        if name_key(name) in self.name_index:
+            messagebox.showerror("Duplicate Error", "Contact with this name already exists!")
+            return
         
         # Generate unique ID and store contact
         contact_id = self.generate_contact_id(name)
@@ -250,8 +316,10 @@ class PersonalContactManager:
             "address": address,
             "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
+        self.name_index[name_key(name)] = contact_id
+        self.index_contact(contact_id)
         
-        if self.persist_contact_data():
+        if self.persist_contact_data(contact_id):
             messagebox.showinfo("Success", "New contact has been created!")
             self.execute_clear()
             self.populate_contact_display()
@@ -271,13 +339,16 @@ class PersonalContactManager:
             return
         
         # Check for name conflicts (excluding current contact)
-        for contact_id, contact_info in self.contact_database.items():
-            if (contact_id != self.currently_selected and 
-                contact_info["name"].lower() == name.lower()):
-                messagebox.showerror("Duplicate Error", "Another contact with this name exists!")
-                return
+        owner = self.name_index.get(name_key(name))
+        if owner is not None and owner != self.currently_selected:
+            messagebox.showerror("Duplicate Error", "Another contact with this name exists!")
+            return
         
         # Update contact information
+        old_key = name_key(self.contact_database[self.currently_selected]["name"])
+        if self.name_index.get(old_key) == self.currently_selected:
+            del self.name_index[old_key]
+        self.name_index[name_key(name)] = self.currently_selected
         self.contact_database[self.currently_selected].update({
             "name": name,
             "phone": phone,
@@ -285,8 +356,9 @@ class PersonalContactManager:
             "address": address,
             "modified": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
+        self.index_contact(self.currently_selected)
         
-        if self.persist_contact_data():
+        if self.persist_contact_data(self.currently_selected):
             messagebox.showinfo("Success", "Contact information has been updated!")
             self.populate_contact_display()
     
@@ -301,8 +373,11 @@ class PersonalContactManager:
                                      f"Delete contact '{contact_name}'?\n\nThis action cannot be undone.")
         
         if confirm:
+            if self.name_index.get(name_key(contact_name)) == self.currently_selected:
+                del self.name_index[name_key(contact_name)]
             del self.contact_database[self.currently_selected]
-            if self.persist_contact_data():
+            self.index_contact(self.currently_selected)
+            if self.persist_contact_data(self.currently_selected):
                 messagebox.showinfo("Success", "Contact has been removed!")
                 self.execute_clear()
                 self.populate_contact_display()
@@ -320,64 +395,155 @@ class PersonalContactManager:
         self.search_input.set("")
         self.contact_list.selection_clear(0, tk.END)
     
+    @perf_monitor.timed("ui.populate")
     def populate_contact_display(self):
         """Refresh the contact list display"""
+        self.show_contacts(self.contact_database)
+    
+    def show_contacts(self, contact_ids, ranked=False):
+        """Fill the list with contacts sorted by name, or in the given order when ranked"""
+        contacts = self.contact_database
+        if ranked:
+            self.displayed_ids = list(contact_ids)
+        else:
+            # Sort contacts alphabetically by name
+            self.displayed_ids = sorted(contact_ids, key=lambda contact_id: contacts[contact_id]["name"].casefold())
+        
+        # One insert call for all rows instead of one per contact
         self.contact_list.delete(0, tk.END)
-        
-        # Sort contacts alphabetically by name
-        sorted_contacts = sorted(self.contact_database.items(), 
-                               key=lambda x: x[1]["name"].lower())
-        
-        for contact_id, contact_info in sorted_contacts:
-            display_text = f"{contact_info['name']} | {contact_info['phone']}"
-            self.contact_list.insert(tk.END, display_text)
-            # Store contact ID for reference
-            self.contact_list.insert(tk.END, contact_id)
-            self.contact_list.delete(tk.END)
+        if self.displayed_ids:
+            self.contact_list.insert(tk.END, *[f"{contacts[contact_id]['name']} | {contacts[contact_id]['phone']}"
+                                               for contact_id in self.displayed_ids])
     
+    @perf_monitor.timed("ui.select")
     def handle_contact_selection(self, event):
         """Process contact selection from list"""
         selection = self.contact_list.curselection()
         if not selection:
             return
         
-        selected_text = self.contact_list.get(selection[0])
-        selected_name = selected_text.split(" | ")[0]
+        # Rows and displayed_ids are kept aligned, so the row index is enough
+        contact_id = self.displayed_ids[selection[0]]
+        contact_info = self.contact_database[contact_id]
         
-        # Find contact by name
-        for contact_id, contact_info in self.contact_database.items():
-            if contact_info["name"] == selected_name:
-                self.currently_selected = contact_id
-                
-                # Populate form fields
-                self.execute_clear()
-                self.input_fields["contact_name"].insert(0, contact_info["name"])
-                self.input_fields["contact_phone"].insert(0, contact_info["phone"])
-                self.input_fields["contact_email"].insert(0, contact_info["email"])
-                self.input_fields["contact_address"].insert("1.0", contact_info["address"])
-                
-                self.currently_selected = contact_id
-                break
+        # Populate form fields
+        self.execute_clear()
+        self.input_fields["contact_name"].insert(0, contact_info["name"])
+        self.input_fields["contact_phone"].insert(0, contact_info["phone"])
+        self.input_fields["contact_email"].insert(0, contact_info["email"])
+        self.input_fields["contact_address"].insert("1.0", contact_info["address"])
+        
+        self.currently_selected = contact_id
+    
+    def schedule_search(self, *args):
+        """Debounce typing so the list is rebuilt once the user pauses"""
+        if self.search_job:
+            self.master.after_cancel(self.search_job)
+        self.search_job = self.master.after(SEARCH_DELAY_MS, self.perform_search)
     
-    def perform_search(self, *args):
+    @perf_monitor.timed("ui.search")
+    def perform_search(self):
         """Filter contacts based on search input"""
-        search_term = self.search_input.get().lower()
-        self.contact_list.delete(0, tk.END)
+        self.search_job = None
+        search_term = self.search_input.get()
+        
+        if not self.indexes_ready:
+            # Still building: plain substring matching, rerun once the indexes are in
+            search_term = search_term.casefold()
+            self.show_contacts([contact_id for contact_id, contact_info in self.contact_database.items()
+                                if any(search_term in (contact_info.get(field) or "").casefold()
+                                       for field in SEARCH_FIELDS)])
+        elif self.fuzzy_search.get() and search_term.strip():
+            # Closest matches on name or email, best first
+            self.show_contacts(self.fuzzy_index.search(search_term), ranked=True)
+        else:
+            # Substring matches on name, phone, email or address, from the trigram index
+            matches = self.search_index.search(search_term)
+            if (len(phone_digits(search_term)) >= PHONE_QUERY_DIGITS
+                    and not any(char.isalpha() for char in search_term)):
+                # Digits alone: "555 12" by prefix, "+1 555 123 4567" against a stored "(555) 123-4567"
+                matches = (matches | self.phone_index.starting_with(search_term)
+                           | self.phone_index.caller_id(search_term))
+            self.show_contacts(matches)
+    
+    def import_contacts(self):
+        """Bulk-import contacts from a vCard or CSV file in one transaction"""
+        path = filedialog.askopenfilename(title="Import Contacts", filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        
+        self.set_editing_state(tk.DISABLED)
+        self.import_progress["value"] = 0
+        self.import_progress.pack(fill=tk.X, padx=20, pady=(0, 20))
+        taken = set(self.name_index)
+        
+        def run():
+            try:
+                # sqlite3 connections belong to the thread that opened them
+                store = ContactStore(self.store.db_path, self.store.pickle_path)
+                try:
+                    imported, report = contact_transfer.import_contacts(
+                        store, path, taken,
+                        progress=lambda fraction: self.master.after(0, self.import_progress.config, {"value": fraction}))
+                finally:
+                    store.close()
+                self.master.after(0, self.import_finished, imported, report)
+            except Exception as error:
+                self.master.after(0, self.import_failed, error)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def set_editing_state(self, state):
+        """Enable or disable every button that writes to the book"""
+        for button in self.editing_buttons:
+            button.config(state=state)
+    
+    def import_finished(self, imported, report):
+        """Show the imported contacts once, then report skipped entries"""
+        self.import_progress.pack_forget()
+        self.set_editing_state(tk.NORMAL)
+        self.contact_database.update(imported)
+        self.rebuild_name_index()
+        self.rebuild_search_indexes()
+        self.populate_contact_display()
         
-        # Filter and display matching contacts
-        for contact_id, contact_info in self.contact_database.items():
-            if (search_term in contact_info["name"].lower() or
-                search_term in contact_info["phone"].lower() or
-                search_term in contact_info["email"].lower() or
-                search_term in contact_info["address"].lower() or
-                search_term == ""):
-                
-                display_text = f"{contact_info['name']} | {contact_info['phone']}"
-                self.contact_list.insert(tk.END, display_text)
+        message = f"Imported {report['imported']} contacts."
+        if report["rejected"]:
+            message += f"\n\nSkipped {report['rejected']} invalid entries:\n" + "\n".join(report["errors"])
+        messagebox.showinfo("Import Complete", message)
+    
+    def import_failed(self, error):
+        """Report an import that was rolled back"""
+        self.import_progress.pack_forget()
+        self.set_editing_state(tk.NORMAL)
+        messagebox.showerror("Import Error", f"Unable to import contacts: {error}")
+    
+    def export_contacts(self):
+        """Stream all contacts to a vCard or CSV file in the background"""
+        path = filedialog.asksaveasfilename(title="Export Contacts", defaultextension=".vcf",
+                                            filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        
+        def export():
+            try:
+                store = ContactStore(self.store.db_path, self.store.pickle_path)
+                try:
+                    count = contact_transfer.export_contacts(store, path)
+                finally:
+                    store.close()
+                self.master.after(0, messagebox.showinfo, "Export Complete", f"Exported {count} contacts.")
+            except Exception as error:
+                self.master.after(0, messagebox.showerror, "Export Error", f"Unable to export contacts: {error}")
+        
+        threading.Thread(target=export, daemon=True).start()
     
     def start_application(self):
         """Launch the contact manager"""
-        self.master.mainloop()
+        try:
+            self.master.mainloop()
+        finally:
+            self.store.close()
 
 def launch_contact_manager():
     """Initialize and start the contact management application"""
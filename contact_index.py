@@ -0,0 +1,286 @@
+"""In-memory search indexes over the contact book."""
+import bisect
+import heapq
+import re
+from collections import Counter
+
+import perf_monitor
+from contact_store import phone_digits
+
+# Contact fields that substring search looks at
+SEARCH_FIELDS = ("name", "phone", "email", "address")
+# Joins the fields so that no trigram spans two of them
+FIELD_SEPARATOR = "\x00"
+
+
+def fold(text):
+    """Case-insensitive form used for indexing and queries"""
+    return text.casefold()
+
+
+def trigrams(text):
+    """Set of every 3-character substring of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Substring search via trigram posting lists, narrowed incrementally as a query grows"""
+
+    def __init__(self):
+        self.texts = {}      # contact_id -> folded, joined search fields
+        self.postings = {}   # trigram -> set of contact ids
+        self.last_query = None
+        self.last_result = None
+
+    @perf_monitor.timed("search.index_build")
+    def rebuild(self, contacts):
+        """Index a whole {contact_id: info} dict from scratch"""
+        self.texts = {}
+        self.postings = {}
+        for contact_id, info in contacts.items():
+            self.add(contact_id, info)
+
+    def add(self, contact_id, info):
+        """Index one contact; replaces any earlier version of it"""
+        self.remove(contact_id)
+        text = FIELD_SEPARATOR.join(fold(info.get(field) or "") for field in SEARCH_FIELDS)
+        self.texts[contact_id] = text
+        for gram in trigrams(text):
+            self.postings.setdefault(gram, set()).add(contact_id)
+        self.last_query = None
+
+    def remove(self, contact_id):
+        """Drop one contact from the index, if present"""
+        text = self.texts.pop(contact_id, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(contact_id)
+                if not ids:
+                    del self.postings[gram]
+        self.last_query = None
+
+    @perf_monitor.timed("search.query")
+    def search(self, query):
+        """Ids of contacts with query as a substring of any search field"""
+        query = fold(query)
+        if not query:
+            return set(self.texts)
+
+        if self.last_query is not None and self.last_query in query:
+            # The user kept typing: only the previous matches can still match
+            candidates = self.last_result
+        elif len(query) >= 3:
+            grams = sorted((self.postings.get(gram, ()) for gram in trigrams(query)), key=len)
+            candidates = set(grams[0]).intersection(*grams[1:])
+        else:
+            # One or two characters have no trigram to look up
+            candidates = self.texts
+
+        # Trigram hits can still be false positives, e.g. "abcd" for the query "abcxbcd"
+        texts = self.texts
+        result = {contact_id for contact_id in candidates if query in texts[contact_id]}
+        self.last_query, self.last_result = query, result
+        return result
+
+
+# Fuzzy search returns at most this many contacts, best first
+FUZZY_LIMIT = 50
+# Words are runs of letters, so "jon.smith42" gives "jon" and "smith"
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+def words(info):
+    """Casefolded words of a contact's name and email user name, for fuzzy matching"""
+    email_user = (info.get("email") or "").partition("@")[0]
+    return tuple(dict.fromkeys(re.findall(WORD_PATTERN, fold(f"{info.get('name') or ''} {email_user}"))))
+
+
+def typo_allowance(word):
+    """Edit distance tolerated for a query word; longer words may hold more typos"""
+    return 1 if len(word) <= 4 else 2 if len(word) <= 8 else 3
+
+
+def levenshtein(first, second, limit):
+    """Edit distance between two strings, or limit + 1 once it is known to exceed limit"""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, start=1):
+        current = [row]
+        left = lowest = row
+        # Comparisons instead of min() in the inner loop; this is the hot spot of fuzzy search
+        for second_char, diagonal, above in zip(second, previous, previous[1:]):
+            left += 1
+            if above + 1 < left:
+                left = above + 1
+            if second_char != first_char:
+                diagonal += 1
+            if diagonal < left:
+                left = diagonal
+            if left < lowest:
+                lowest = left
+            current.append(left)
+        if lowest > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def word_grams(word):
+    """Distinct trigrams of a word padded with two markers on each side"""
+    return trigrams(f"##{word}$$")
+
+
+class FuzzyIndex:
+    """Typo-tolerant, ranked search over contact names and emails"""
+
+    def __init__(self):
+        self.owners = {}   # word -> set of contact ids using it
+        self.words = {}    # contact_id -> its words
+        self.grams = {}    # padded trigram -> set of words containing it
+
+    @perf_monitor.timed("search.fuzzy_build")
+    def rebuild(self, contacts):
+        """Index a whole {contact_id: info} dict from scratch"""
+        self.owners = {}
+        self.words = {}
+        self.grams = {}
+        for contact_id, info in contacts.items():
+            self.add(contact_id, info)
+
+    def add(self, contact_id, info):
+        """Index one contact; replaces any earlier version of it"""
+        self.remove(contact_id)
+        self.words[contact_id] = contact_words = words(info)
+        for word in contact_words:
+            owners = self.owners.get(word)
+            if owners is None:
+                owners = self.owners[word] = set()
+                for gram in word_grams(word):
+                    self.grams.setdefault(gram, set()).add(word)
+            owners.add(contact_id)
+
+    def remove(self, contact_id):
+        """Drop one contact from the index, if present"""
+        for word in self.words.pop(contact_id, ()):
+            owners = self.owners[word]
+            owners.discard(contact_id)
+            if not owners:
+                # Last contact using the word: forget it entirely
+                del self.owners[word]
+                for gram in word_grams(word):
+                    self.grams[gram].discard(word)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+
+    def close_words(self, query_word):
+        """{word: edit distance} of indexed words within the typo allowance of query_word"""
+        radius = typo_allowance(query_word)
+        grams = word_grams(query_word)
+        # One edit changes at most three padded trigrams, so a word within radius still
+        # shares all but 3 * radius of them; only those few words get the full distance
+        needed = max(1, len(grams) - 3 * radius)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        found = {}
+        for word, count in shared.items():
+            if count >= needed and abs(len(word) - len(query_word)) <= radius:
+                distance = levenshtein(query_word, word, radius)
+                if distance <= radius:
+                    found[word] = distance
+        return found
+
+    @perf_monitor.timed("search.fuzzy_query")
+    def search(self, query, limit=FUZZY_LIMIT):
+        """Ids of the closest contacts, best first, ranked by total edit distance per query word"""
+        query_words = re.findall(WORD_PATTERN, fold(query))
+        # Per query word, each candidate contact's distance to its closest word
+        best = []
+        for query_word in query_words:
+            distances = {}
+            for word, distance in self.close_words(query_word).items():
+                for contact_id in self.owners[word]:
+                    if distance < distances.get(contact_id, len(query_word) + 1):
+                        distances[contact_id] = distance
+            best.append(distances)
+
+        candidates = set().union(*best)
+
+        def score(contact_id):
+            # A query word with no close word in the contact costs as much as typing it out
+            return sum(distances.get(contact_id, len(query_word))
+                       for query_word, distances in zip(query_words, best))
+        return heapq.nsmallest(limit, candidates, key=lambda contact_id: (score(contact_id), self.words[contact_id]))
+
+
+# Incoming numbers match stored ones on at least this many trailing digits
+CALLER_ID_DIGITS = 7
+
+
+class PhoneIndex:
+    """Sorted arrays of normalized phone digits, searched with bisect for prefix and suffix lookups"""
+
+    def __init__(self):
+        self.digits = {}     # contact_id -> normalized digits
+        self.forward = []    # sorted (digits, contact_id)
+        self.backward = []   # sorted (reversed digits, contact_id)
+
+    def rebuild(self, contacts):
+        """Index a whole {contact_id: info} dict from scratch"""
+        self.digits = {contact_id: phone_digits(info.get("phone") or "")
+                       for contact_id, info in contacts.items()}
+        self.forward = sorted((digits, contact_id) for contact_id, digits in self.digits.items())
+        self.backward = sorted((digits[::-1], contact_id) for contact_id, digits in self.digits.items())
+
+    def add(self, contact_id, info):
+        """Index one contact; replaces any earlier version of it"""
+        self.remove(contact_id)
+        digits = self.digits[contact_id] = phone_digits(info.get("phone") or "")
+        bisect.insort(self.forward, (digits, contact_id))
+        bisect.insort(self.backward, (digits[::-1], contact_id))
+
+    def remove(self, contact_id):
+        """Drop one contact from the index, if present"""
+        digits = self.digits.pop(contact_id, None)
+        if digits is None:
+            return
+        for entries, key in ((self.forward, digits), (self.backward, digits[::-1])):
+            del entries[bisect.bisect_left(entries, (key, contact_id))]
+
+    @staticmethod
+    def prefixed(entries, prefix):
+        """Contact ids of the sorted entries whose key starts with prefix"""
+        # ":" sorts right after "9", so it bounds every digit string starting with prefix
+        start = bisect.bisect_left(entries, (prefix,))
+        end = bisect.bisect_left(entries, (prefix + ":",))
+        return {contact_id for _, contact_id in entries[start:end]}
+
+    def starting_with(self, number):
+        """Ids of contacts whose phone digits start with those of number"""
+        digits = phone_digits(number)
+        return self.prefixed(self.forward, digits) if digits else set()
+
+    def ending_with(self, number):
+        """Ids of contacts whose phone digits end with those of number"""
+        digits = phone_digits(number)
+        return self.prefixed(self.backward, digits[::-1]) if digits else set()
+
+    def caller_id(self, number):
+        """Ids of contacts with the same number, allowing an extra country code in front of either one"""
+        digits = phone_digits(number)
+        if len(digits) < CALLER_ID_DIGITS:
+            return set()
+        # Stored "5551234567" for an incoming "15551234567", and the other way round
+        matches = self.ending_with(digits)
+        backward = self.backward
+        for length in range(CALLER_ID_DIGITS, len(digits)):
+            key = digits[-length:][::-1]
+            index = bisect.bisect_left(backward, (key,))
+            while index < len(backward) and backward[index][0] == key:
+                matches.add(backward[index][1])
+                index += 1
+        return matches
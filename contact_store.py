@@ -0,0 +1,193 @@
+import os
+import pickle
+import re
+import sqlite3
+import unicodedata
+
+import perf_monitor
+
+DB_FILE = 'personal_contacts.db'
+PICKLE_FILE = 'personal_contacts.pkl'
+
+# Fields of a contact record, in table column order after the id
+CONTACT_FIELDS = ("name", "phone", "email", "address", "created", "modified")
+# Everything that is not a decimal digit, in any script
+NON_DIGITS = re.compile(r"\D")
+# Writes one contact row; parameters come from record_values()
+SAVE_SQL = (f"INSERT OR REPLACE INTO contacts (id, name_key, phone_digits, {', '.join(CONTACT_FIELDS)}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(CONTACT_FIELDS))})")
+# Adds one new contact row; an id already in use fails instead of replacing that contact
+INSERT_SQL = SAVE_SQL.replace("INSERT OR REPLACE", "INSERT", 1)
+
+
+def name_key(name):
+    """Comparison key for contact names: NFKC-normalized, stripped and casefolded"""
+    # casefold() also folds e.g. "Straße" to "strasse", which lower() leaves alone
+    return unicodedata.normalize("NFKC", name).strip().casefold()
+
+
+def phone_digits(phone):
+    """Normalized phone number: only its digits, as ASCII, so formatting never affects matches"""
+    digits = NON_DIGITS.sub("", phone)
+    # Only convert character by character when there are non-ASCII digits such as "٥"
+    return digits if digits.isascii() else "".join(str(unicodedata.decimal(char)) for char in digits)
+
+
+def check_contact(name, phone, email):
+    """Raise ValueError with a user-facing message unless the required fields are valid"""
+    if not name.strip():
+        raise ValueError("Contact name cannot be empty!")
+    if not phone.strip():
+        raise ValueError("Phone number is required!")
+    if not email.strip():
+        raise ValueError("Email address is required!")
+    if "@" not in email or email.count("@") != 1 or "." not in email.split("@")[1]:
+        raise ValueError("Invalid email address format!")
+    if len(phone_digits(phone)) < 10:
+        raise ValueError("Phone number needs at least 10 digits!")
+
+
+def record_values(contact_id, info):
+    """SAVE_SQL parameters for one contact"""
+    return ((contact_id, name_key(info["name"]), phone_digits(info.get("phone") or ""))
+            + tuple(info.get(field) for field in CONTACT_FIELDS))
+
+
+class ContactStore:
+    """SQLite contact storage where every mutation writes only the record it changes"""
+
+    def __init__(self, db_path=DB_FILE, pickle_path=PICKLE_FILE):
+        self.db_path = db_path
+        self.pickle_path = pickle_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.setup_schema()
+
+    def setup_schema(self):
+        """Create or migrate the contacts schema up to the current version"""
+        migrations = [self.create_base_schema, self.import_pickle, self.add_name_key,
+                      self.add_phone_digits]
+
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        for number, migrate in enumerate(migrations, start=1):
+            if version < number:
+                with self.connection:
+                    migrate()
+                    self.connection.execute(f"PRAGMA user_version = {number}")
+
+    def create_base_schema(self):
+        """Migration 1: one row per contact, keyed by the generated contact id"""
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS contacts (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                phone TEXT,
+                email TEXT,
+                address TEXT,
+                created TEXT,
+                modified TEXT
+            )
+        ''')
+
+    def import_pickle(self):
+        """Migration 2: copy contacts out of the old pickle file, once"""
+        try:
+            with open(self.pickle_path, 'rb') as file:
+                contacts = pickle.load(file)
+        except FileNotFoundError:
+            return
+        except (EOFError, pickle.UnpicklingError) as error:
+            # Refuse to start empty and later overwrite what might still be recoverable
+            raise ValueError(f"{self.pickle_path} is damaged and was not imported: {error}")
+
+        self.connection.executemany(
+            f"INSERT OR IGNORE INTO contacts (id, {', '.join(CONTACT_FIELDS)}) "
+            f"VALUES (?, {', '.join('?' * len(CONTACT_FIELDS))})",
+            ((contact_id,) + tuple(info.get(field) for field in CONTACT_FIELDS)
+             for contact_id, info in contacts.items()))
+        # Commit before renaming, so the contacts always live in one of the two files
+        self.connection.commit()
+        # Keep the old file around, renamed so it is never imported twice
+        os.replace(self.pickle_path, self.pickle_path + ".migrated")
+
+    def add_name_key(self):
+        """Migration 3: indexed name_key column for case-insensitive name lookups"""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(contacts)")]
+        if "name_key" not in columns:
+            self.connection.execute("ALTER TABLE contacts ADD COLUMN name_key TEXT")
+        rows = self.connection.execute("SELECT id, name FROM contacts").fetchall()
+        self.connection.executemany("UPDATE contacts SET name_key=? WHERE id=?",
+                                    [(name_key(name), contact_id) for contact_id, name in rows])
+        # Not UNIQUE: older books may hold names that only casefolding makes equal
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_contacts_name_key ON contacts (name_key)")
+
+    def add_phone_digits(self):
+        """Migration 4: indexed phone_digits column, the phone number without formatting"""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(contacts)")]
+        if "phone_digits" not in columns:
+            self.connection.execute("ALTER TABLE contacts ADD COLUMN phone_digits TEXT")
+        rows = self.connection.execute("SELECT id, phone FROM contacts").fetchall()
+        self.connection.executemany("UPDATE contacts SET phone_digits=? WHERE id=?",
+                                    [(phone_digits(phone or ""), contact_id) for contact_id, phone in rows])
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_contacts_phone_digits ON contacts (phone_digits)")
+
+    @perf_monitor.timed("storage.load_all")
+    def load_all(self):
+        """Return every contact as {contact_id: {field: value}}"""
+        rows = self.connection.execute(
+            f"SELECT id, {', '.join(CONTACT_FIELDS)} FROM contacts")
+        contacts = {}
+        for contact_id, *values in rows:
+            contacts[contact_id] = {field: value for field, value in zip(CONTACT_FIELDS, values)
+                                    if value is not None}
+        return contacts
+
+    @perf_monitor.timed("storage.save")
+    def save(self, contact_id, info):
+        """Insert or replace one contact record"""
+        with self.connection:
+            self.connection.execute(SAVE_SQL, record_values(contact_id, info))
+
+    @perf_monitor.timed("storage.insert_many")
+    def insert_many(self, chunks):
+        """Add streamed lists of (contact_id, info) pairs as new contacts in one transaction
+
+        A chunk is only read after the previous one is written, so the generator producing
+        them may query this store, e.g. through existing_ids().
+        """
+        with self.connection:
+            for contacts in chunks:
+                self.connection.executemany(INSERT_SQL, [record_values(contact_id, info)
+                                                         for contact_id, info in contacts])
+
+    def existing_ids(self, contact_ids):
+        """The subset of contact_ids already used by stored contacts"""
+        contact_ids = list(contact_ids)
+        rows = self.connection.execute(
+            f"SELECT id FROM contacts WHERE id IN ({', '.join('?' * len(contact_ids))})", contact_ids)
+        return {row[0] for row in rows}
+
+    @perf_monitor.timed("storage.delete")
+    def delete(self, contact_id):
+        """Remove one contact record"""
+        with self.connection:
+            self.connection.execute("DELETE FROM contacts WHERE id=?", (contact_id,))
+
+    def iter_contacts(self, chunk_size=1000):
+        """Stream (contact_id, info) pairs in name order without holding the table in memory"""
+        cursor = self.connection.execute(
+            f"SELECT id, {', '.join(CONTACT_FIELDS)} FROM contacts ORDER BY name_key")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for contact_id, *values in rows:
+                yield contact_id, {field: value for field, value in zip(CONTACT_FIELDS, values)
+                                   if value is not None}
+
+    def close(self):
+        """Close the database connection"""
+        self.connection.close()
@@ -0,0 +1,185 @@
+import csv
+import os
+import re
+from datetime import datetime
+
+from bulk_import import new_report, validated_chunks
+from contact_store import CONTACT_FIELDS, check_contact, name_key
+
+# vCard lines are folded at this many characters on export
+VCARD_LINE_LENGTH = 75
+
+
+def file_format(path):
+    """Pick 'vcf' or 'csv' from a file name"""
+    return "vcf" if path.lower().endswith((".vcf", ".vcard")) else "csv"
+
+
+def new_contact_ids(count):
+    """count random 12-character hex ids, from one call to the OS random source"""
+    data = os.urandom(6 * count).hex()
+    return [data[start:start + 12] for start in range(0, len(data), 12)]
+
+
+def unused_contact_ids(store, count):
+    """count distinct new contact ids, drawing again for any a stored contact already has"""
+    ids = []
+    while len(ids) < count:
+        candidates = set(new_contact_ids(count - len(ids))).difference(ids)
+        ids.extend(candidates - store.existing_ids(candidates))
+    return ids
+
+
+def unescape(value):
+    """Undo vCard text escaping: \\n, \\, \\; and \\\\"""
+    return re.sub(r"\\(.)", lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+
+def escape(value):
+    """vCard text escaping for one property value"""
+    return (value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def unfolded_lines(file):
+    """Stream (line number, logical line) pairs, joining vCard continuation lines"""
+    pending = None
+    for line_number, line in enumerate(file, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending = (pending[0], pending[1] + line[1:])
+            continue
+        if pending is not None:
+            yield pending
+        pending = (line_number, line)
+    if pending is not None:
+        yield pending
+
+
+def read_vcards(file):
+    """Stream contact records from a vCard 3.0 / 4.0 file as (line, dict) pairs"""
+    card = None
+    for line_number, line in unfolded_lines(file):
+        head, _, value = line.partition(":")
+        # "item1.TEL;TYPE=cell" -> "TEL"
+        prop = head.split(";")[0].rpartition(".")[2].upper()
+        if prop == "BEGIN" and value.strip().upper() == "VCARD":
+            card, start = {}, line_number
+        elif card is None:
+            continue
+        elif prop == "END":
+            if "name" not in card and "structured_name" in card:
+                # No FN: use N, which is family;given;additional;prefix;suffix
+                family, given, additional = (card.pop("structured_name").split(";") + ["", ""])[:3]
+                card["name"] = " ".join(unescape(part) for part in (given, additional, family) if part)
+            card.pop("structured_name", None)
+            yield start, card
+            card = None
+        elif prop == "FN":
+            card["name"] = unescape(value)
+        elif prop == "N":
+            card["structured_name"] = value
+        elif prop == "TEL":
+            # vCard 4.0 may write the number as a tel: URI
+            card.setdefault("phone", unescape(re.sub(r"^tel:", "", value, flags=re.IGNORECASE)))
+        elif prop == "EMAIL":
+            card.setdefault("email", unescape(value))
+        elif prop == "ADR":
+            # pobox;extended;street;locality;region;postal code;country
+            parts = [unescape(part).strip() for part in re.split(r"(?<!\\);", value)]
+            card.setdefault("address", ", ".join(part for part in parts if part))
+
+
+def read_records(file, file_type):
+    """Stream contact records from an open vCard or CSV file as (line, dict) pairs"""
+    if file_type == "vcf":
+        yield from read_vcards(file)
+    else:
+        reader = csv.DictReader(file)
+        for record in reader:
+            # Header case and spacing vary between address book exports
+            yield reader.line_num, {str(key).strip().lower(): value for key, value in record.items()}
+
+
+def validate_record(record, taken, created):
+    """Normalize one record into contact info, raising ValueError when invalid"""
+    name = str(record.get("name") or "").strip()
+    phone = str(record.get("phone") or "").strip()
+    email = str(record.get("email") or "").strip()
+    check_contact(name, phone, email)
+    if name_key(name) in taken:
+        raise ValueError("Contact with this name already exists!")
+
+    info = {"name": name, "phone": phone, "email": email,
+            "address": str(record.get("address") or "").strip(),
+            "created": str(record.get("created") or "").strip() or created}
+    modified = str(record.get("modified") or "").strip()
+    if modified:
+        info["modified"] = modified
+    taken.add(name_key(name))
+    return info
+
+
+def import_contacts(store, path, taken, progress=None, chunk_size=1000):
+    """Import a vCard or CSV file in one transaction; returns ({contact_id: info}, report)
+
+    taken holds the name keys already in the book and gains the imported ones;
+    progress, if given, is called with the fraction of the file read after each chunk.
+    """
+    report = new_report()
+    imported = {}
+    created = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    size = os.path.getsize(path) or 1
+
+    # utf-8-sig skips the byte order mark spreadsheet programs put on CSV files
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        def identified(chunks):
+            for contacts in chunks:
+                pairs = list(zip(unused_contact_ids(store, len(contacts)), contacts))
+                imported.update(pairs)
+                yield pairs
+                report["imported"] += len(contacts)
+                if progress:
+                    progress(min(1.0, file.buffer.tell() / size))
+
+        chunks = validated_chunks(read_records(file, file_format(path)),
+                                  lambda record: validate_record(record, taken, created), report, chunk_size)
+        store.insert_many(identified(chunks))
+    return imported, report
+
+
+def vcard_lines(info):
+    """vCard 3.0 lines for one contact, folded to VCARD_LINE_LENGTH"""
+    # N is family;given;additional;prefix;suffix: take the last word as the family name
+    given, _, family = info["name"].strip().rpartition(" ")
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{escape(info['name'])}",
+             f"N:{escape(family)};{escape(given)};;;"]
+    if info.get("phone"):
+        lines.append(f"TEL;TYPE=VOICE:{escape(info['phone'])}")
+    if info.get("email"):
+        lines.append(f"EMAIL;TYPE=INTERNET:{escape(info['email'])}")
+    if info.get("address"):
+        lines.append(f"ADR:;;{escape(info['address'])};;;;")
+    lines.append("END:VCARD")
+    for line in lines:
+        # Continuation lines start with a space, which unfolding removes
+        yield line[:VCARD_LINE_LENGTH]
+        for start in range(VCARD_LINE_LENGTH, len(line), VCARD_LINE_LENGTH - 1):
+            yield " " + line[start:start + VCARD_LINE_LENGTH - 1]
+
+
+def export_contacts(store, path):
+    """Stream every contact into a vCard or CSV file and return the contact count"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        if file_format(path) == "vcf":
+            for _, info in store.iter_contacts():
+                file.write("".join(line + "\r\n" for line in vcard_lines(info)))
+                count += 1
+        else:
+            writer = csv.writer(file)
+            writer.writerow(CONTACT_FIELDS)
+            for _, info in store.iter_contacts():
+                writer.writerow([info.get(field, "") for field in CONTACT_FIELDS])
+                count += 1
+    return count
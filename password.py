@@ -1,6 +1,7 @@
 from tkinter import *
 import random, string
 import pyperclip
+import perf_monitor
 
 # Main window setup
 root = Tk()
@@ -39,6 +40,7 @@ Checkbutton(options_frame, text="Include Special Characters (!@#$%)",
 # Generated password display
 password_result = StringVar()
 
+@perf_monitor.timed("password.create")
 def create_password():
     chars_upper = string.ascii_uppercase
     chars_lower = string.ascii_lowercase  
@@ -101,6 +103,7 @@ password_entry = Entry(display_frame, textvariable=password_result, width=40,
 password_entry.pack(pady=5)
 
 # Copy functionality
+@perf_monitor.timed("password.copy")
 def copy_to_clipboard():
     if password_result.get():
         pyperclip.copy(password_result.get())
@@ -122,4 +125,5 @@ info_frame.pack(side=BOTTOM, pady=20)
 Label(info_frame, text="Tip: Use passwords with 12+ characters for better security", 
       font=("Georgia", 9, "italic"), bg="#2c3e50", fg="#95a5a6").pack()
 
+perf_monitor.start(root, "password")
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Opt-in timing of hot paths plus a Tk event-loop lag probe.
+
+Nothing is measured unless the PERF_MONITOR environment variable is set:
+
+    PERF_MONITOR=1 python to_do_list.py
+
+    PERF_MONITOR_FILE        metrics file (default perf_metrics.jsonl), one JSON line per
+                             interval with count / p50 / p99 / max milliseconds per name
+    PERF_MONITOR_PROFILE     write a cProfile dump to this path on exit
+    PERF_MONITOR_TRACEMALLOC write the top allocation sites to this path on exit
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = bool(os.environ.get("PERF_MONITOR"))
+METRICS_FILE = os.environ.get("PERF_MONITOR_FILE", "perf_metrics.jsonl")
+PROFILE_FILE = os.environ.get("PERF_MONITOR_PROFILE")
+TRACEMALLOC_FILE = os.environ.get("PERF_MONITOR_TRACEMALLOC")
+
+# Summaries are appended this often; the file rolls over to .1 past MAX_FILE_BYTES
+FLUSH_SECONDS = 10
+MAX_FILE_BYTES = 1024 * 1024
+# The lag probe asks Tk for a callback this often and records how late it runs
+PROBE_MS = 100
+
+samples = {}
+samples_lock = threading.Lock()
+last_flush = time.monotonic()
+
+
+def record(name, milliseconds):
+    """Add one duration sample; safe from any thread"""
+    with samples_lock:
+        samples.setdefault(name, []).append(milliseconds)
+
+
+def timed(name):
+    """Decorator timing every call under name; returns the function untouched when disabled"""
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+
+def summarize(values):
+    """count / p50 / p99 / max of a list of milliseconds"""
+    values = sorted(values)
+    def at(fraction):
+        return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+    return {"count": len(values), "p50_ms": at(0.5), "p99_ms": at(0.99), "max_ms": at(1.0)}
+
+
+def flush(app):
+    """Append the samples gathered since the last flush to the metrics file"""
+    global samples, last_flush
+    with samples_lock:
+        taken, samples = samples, {}
+    last_flush = time.monotonic()
+    if not taken:
+        return
+    line = json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "app": app,
+                       "metrics": {name: summarize(values) for name, values in sorted(taken.items())}})
+    try:
+        if os.path.exists(METRICS_FILE) and os.path.getsize(METRICS_FILE) > MAX_FILE_BYTES:
+            os.replace(METRICS_FILE, METRICS_FILE + ".1")
+        with open(METRICS_FILE, 'a', encoding='utf-8') as file:
+            file.write(line + "\n")
+    except OSError:
+        pass  # monitoring must never take the application down
+
+
+def probe(root, app, expected):
+    """One tick of the event-loop lag probe; reschedules itself"""
+    now = time.monotonic()
+    record("tk.loop_lag", max(0.0, (now - expected) * 1000))
+    if now - last_flush >= FLUSH_SECONDS:
+        flush(app)
+    root.after(PROBE_MS, probe, root, app, time.monotonic() + PROBE_MS / 1000)
+
+
+def start(root, app):
+    """Begin the lag probe and arrange exit dumps for one Tk application"""
+    if not ENABLED:
+        return
+    root.after(PROBE_MS, probe, root, app, time.monotonic() + PROBE_MS / 1000)
+
+    profiler = None
+    if PROFILE_FILE:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if TRACEMALLOC_FILE:
+        import tracemalloc
+        tracemalloc.start(10)
+
+    def finish():
+        flush(app)
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(PROFILE_FILE)
+        if TRACEMALLOC_FILE:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            with open(TRACEMALLOC_FILE, 'w', encoding='utf-8') as file:
+                current, peak = tracemalloc.get_traced_memory()
+                file.write(f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    file.write(f"{stat}\n")
+    atexit.register(finish)
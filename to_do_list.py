@@ -1,10 +1,25 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import sqlite3
-import datetime
 import threading
-import time
-import calendar
+import datetime
+from todo_store import TaskStore
+from todo_reminders import ReminderScheduler
+from todo_widgets import VirtualTaskList, CalendarPicker, StatsPanel
+from todo_format import TaskFormatter
+import todo_transfer
+import perf_monitor
+from todo_recurrence import REPEAT_OPTIONS, WEEKDAY_NAMES
+
+# Archival of old completed tasks runs shortly after startup, then hourly
+ARCHIVE_FIRST_MS = 5000
+ARCHIVE_EVERY_MS = 3600 * 1000
+# Missed recurring occurrences move on to their next date at startup, then hourly
+SERIES_ROLL_EVERY_MS = 3600 * 1000
+# How often the Tk loop checks whether another client wrote to the database
+CHANGE_POLL_MS = 500
+
+TRANSFER_FILETYPES = [("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
 
 class TodoApplication:
     def __init__(self):
@@ -13,26 +28,14 @@ class TodoApplication:
         self.build_ui()
         self.refresh_tasks()
         self.start_reminder_checker()
+        self.roll_series()
+        self.start_change_watcher()
+        perf_monitor.start(self.root, "todo")
+        self.root.after(ARCHIVE_FIRST_MS, self.archive_tasks)
         
     def setup_database(self):
-        """Initialize SQLite database"""
-        self.connection = sqlite3.connect('todo_tasks.db')
-        self.cursor = self.connection.cursor()
-        
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS todos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task TEXT NOT NULL,
-                due_date TEXT,
-                due_time TEXT,
-                priority TEXT DEFAULT 'Medium',
-                status TEXT DEFAULT 'Pending',
-                reminder_enabled INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                week_day TEXT
-            )
-        ''')
-        self.connection.commit()
+        """Open the task store"""
+        self.store = TaskStore()
         
     def build_ui(self):
         """Create the user interface"""
@@ -128,9 +131,35 @@ class TodoApplication:
                                        font=('Arial', 10))
         reminder_check.grid(row=8, column=0, columnspan=2, pady=10, sticky='w')
         
+        # Recurrence: interval is used by "Every N days", weekdays by "Weekly"
+        repeat_frame = tk.Frame(left_frame, bg='#ffffff')
+        repeat_frame.grid(row=9, column=0, columnspan=2, sticky='ew')
+        
+        tk.Label(repeat_frame, text="Repeat:", font=('Arial', 10, 'bold'),
+                bg='#ffffff').pack(side='left')
+        
+        self.repeat_var = tk.StringVar(value="None")
+        repeat_combo = ttk.Combobox(repeat_frame, textvariable=self.repeat_var,
+                                   values=list(REPEAT_OPTIONS), state="readonly", width=12)
+        repeat_combo.pack(side='left', padx=5)
+        
+        tk.Label(repeat_frame, text="N:", bg='#ffffff', font=('Arial', 10)).pack(side='left')
+        self.interval_var = tk.StringVar(value="2")
+        tk.Spinbox(repeat_frame, from_=1, to=365, textvariable=self.interval_var,
+                  width=4, font=('Arial', 10)).pack(side='left', padx=2)
+        
+        weekday_frame = tk.Frame(left_frame, bg='#ffffff')
+        weekday_frame.grid(row=10, column=0, columnspan=2, sticky='w', pady=(0,5))
+        self.weekday_vars = []
+        for name in WEEKDAY_NAMES:
+            var = tk.BooleanVar()
+            tk.Checkbutton(weekday_frame, text=name[:2], variable=var, bg='#ffffff',
+                          font=('Arial', 8)).pack(side='left')
+            self.weekday_vars.append(var)
+        
         # Action buttons
         button_frame = tk.Frame(left_frame, bg='#ffffff')
-        button_frame.grid(row=9, column=0, columnspan=2, pady=15, sticky='ew')
+        button_frame.grid(row=11, column=0, columnspan=2, pady=15, sticky='ew')
         
         self.add_btn = tk.Button(button_frame, text="➕ Add Task", command=self.add_task,
                                 bg='#28a745', fg='white', font=('Arial', 10, 'bold'),
@@ -170,32 +199,67 @@ class TodoApplication:
         
         self.filter_var = tk.StringVar(value="All")
         filter_combo = ttk.Combobox(filter_frame, textvariable=self.filter_var,
-                                   values=["All", "Pending", "Completed", "High Priority", "Today's Tasks"],
+                                   values=["All", "Pending", "Completed", "High Priority", "Today's Tasks", "Overdue"],
                                    state="readonly", width=15)
         filter_combo.pack(side='left', padx=5)
         filter_combo.bind('<<ComboboxSelected>>', self.apply_filter)
         
+        tk.Label(filter_frame, text="Search:", font=('Arial', 10, 'bold'), bg='#ffffff').pack(side='left', padx=(10,0))
+        
+        self.search_var = tk.StringVar()
+        self.search_var.trace("w", self.schedule_search)
+        self.search_job = None
+        search_entry = tk.Entry(filter_frame, textvariable=self.search_var, font=('Arial', 10),
+                                relief='solid', bd=1, width=18)
+        search_entry.pack(side='left', padx=5)
+        
+        self.archive_var = tk.BooleanVar()
+        tk.Checkbutton(filter_frame, text="🗄 Archive", variable=self.archive_var,
+                      command=self.toggle_archive, bg='#ffffff').pack(side='left')
+        
         refresh_btn = tk.Button(filter_frame, text="🔄", command=self.refresh_tasks,
                                bg='#e0e0e0', relief='flat')
         refresh_btn.pack(side='right')
         
+        export_btn = tk.Button(filter_frame, text="📤", command=self.export_tasks,
+                              bg='#e0e0e0', relief='flat')
+        export_btn.pack(side='right', padx=2)
+        
+        import_btn = tk.Button(filter_frame, text="📥", command=self.import_tasks,
+                              bg='#e0e0e0', relief='flat')
+        import_btn.pack(side='right', padx=2)
+        
+        stats_btn = tk.Button(filter_frame, text="📊", command=self.show_stats,
+                             bg='#e0e0e0', relief='flat')
+        stats_btn.pack(side='right', padx=2)
+        
+        redo_btn = tk.Button(filter_frame, text="↷", command=self.redo,
+                            bg='#e0e0e0', relief='flat')
+        redo_btn.pack(side='right', padx=2)
+        
+        undo_btn = tk.Button(filter_frame, text="↶", command=self.undo,
+                            bg='#e0e0e0', relief='flat')
+        undo_btn.pack(side='right', padx=2)
+        
+        self.root.bind('<Control-z>', lambda event: self.history_shortcut(event, self.undo))
+        self.root.bind('<Control-y>', lambda event: self.history_shortcut(event, self.redo))
+        
         # Task listbox with scrollbar
         list_frame = tk.Frame(right_frame, bg='#ffffff')
         list_frame.pack(fill='both', expand=True)
         
-        self.task_listbox = tk.Listbox(list_frame, font=('Courier', 9), selectmode=tk.SINGLE,
-                                      height=20, bg='#f8f9fa', relief='solid', bd=1)
-        
-        scrollbar = tk.Scrollbar(list_frame, orient='vertical', command=self.task_listbox.yview)
-        self.task_listbox.configure(yscrollcommand=scrollbar.set)
-        
-        self.task_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        # Only the rows in view are fetched and formatted
+        self.formatter = TaskFormatter()
+        self.task_list = VirtualTaskList(list_frame, self.store, self.formatter,
+                                         font=('Courier', 9), selectmode=tk.SINGLE,
+                                         height=20, bg='#f8f9fa', relief='solid', bd=1)
+        self.task_listbox = self.task_list.listbox
         
         self.task_listbox.bind('<<ListboxSelect>>', self.on_task_select)
         
         # Selected task info
         self.selected_task_id = None
+        self.selected_series_id = None
         
     def update_time(self):
         """Update the live time display"""
@@ -206,103 +270,19 @@ class TodoApplication:
         
     def show_calendar(self):
         """Show calendar popup for date selection"""
-        cal_window = tk.Toplevel(self.root)
-        cal_window.title("Select Date")
-        cal_window.geometry("300x250")
-        cal_window.resizable(False, False)
-        cal_window.configure(bg='#ffffff')
-        
-        # Center the window
-        cal_window.transient(self.root)
-        cal_window.grab_set()
-        
-        now = datetime.datetime.now()
-        
-        # Month/Year selection
-        nav_frame = tk.Frame(cal_window, bg='#ffffff')
-        nav_frame.pack(pady=10)
-        
-        self.cal_month = tk.IntVar(value=now.month)
-        self.cal_year = tk.IntVar(value=now.year)
-        
-        tk.Button(nav_frame, text="◀", command=lambda: self.change_month(-1, cal_frame, cal_window),
-                 bg='#e0e0e0').pack(side='left')
-        
-        month_label = tk.Label(nav_frame, text=f"{calendar.month_name[now.month]} {now.year}",
-                              font=('Arial', 12, 'bold'), bg='#ffffff')
-        month_label.pack(side='left', padx=20)
-        self.month_label = month_label
-        
-        tk.Button(nav_frame, text="▶", command=lambda: self.change_month(1, cal_frame, cal_window),
-                 bg='#e0e0e0').pack(side='left')
-        
-        # Calendar frame
-        cal_frame = tk.Frame(cal_window, bg='#ffffff')
-        cal_frame.pack(pady=10)
-        
-        self.create_calendar(cal_frame, cal_window)
+        try:
+            day = datetime.date.fromisoformat(self.date_var.get().strip())
+        except ValueError:
+            day = None
+        CalendarPicker(self.root, self.store, self.select_date, day)
         
-    def change_month(self, direction, cal_frame, cal_window):
-        """Change month in calendar"""
-        new_month = self.cal_month.get() + direction
-        new_year = self.cal_year.get()
+    def show_stats(self):
+        """Show the task statistics dashboard"""
+        StatsPanel(self.root, self.store)
         
-        if new_month > 12:
-            new_month = 1
-            new_year += 1
-        elif new_month < 1:
-            new_month = 12
-            new_year -= 1
-            
-        self.cal_month.set(new_month)
-        self.cal_year.set(new_year)
-        
-        self.month_label.config(text=f"{calendar.month_name[new_month]} {new_year}")
-        
-        # Clear and recreate calendar
-        for widget in cal_frame.winfo_children():
-            widget.destroy()
-        self.create_calendar(cal_frame, cal_window)
-        
-    def create_calendar(self, parent, cal_window):
-        """Create calendar grid"""
-        month = self.cal_month.get()
-        year = self.cal_year.get()
-        
-        # Day headers
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        for i, day in enumerate(days):
-            tk.Label(parent, text=day, font=('Arial', 10, 'bold'), bg='#e9ecef',
-                    width=4, height=1).grid(row=0, column=i, padx=1, pady=1)
-        
-        # Calendar days
-        cal = calendar.monthcalendar(year, month)
-        for week_num, week in enumerate(cal):
-            for day_num, day in enumerate(week):
-                if day == 0:
-                    tk.Label(parent, text="", width=4, height=2, bg='#ffffff').grid(
-                        row=week_num+1, column=day_num, padx=1, pady=1)
-                else:
-                    btn = tk.Button(parent, text=str(day), width=4, height=2,
-                                   command=lambda d=day: self.select_date(d, cal_window),
-                                   bg='#f8f9fa', relief='solid', bd=1)
-                    btn.grid(row=week_num+1, column=day_num, padx=1, pady=1)
-                    
-                    # Highlight today
-                    today = datetime.date.today()
-                    if (day == today.day and month == today.month and year == today.year):
-                        btn.config(bg='#007bff', fg='white', font=('Arial', 10, 'bold'))
-                        
-    def select_date(self, day, cal_window):
+    def select_date(self, selected_date):
         """Handle date selection from calendar"""
-        month = self.cal_month.get()
-        year = self.cal_year.get()
-        
-        selected_date = datetime.date(year, month, day)
-        date_str = selected_date.strftime("%Y-%m-%d")
-        
-        self.date_var.set(date_str)
-        cal_window.destroy()
+        self.date_var.set(selected_date.strftime("%Y-%m-%d"))
         
     def add_task(self):
         """Add new task to database"""
@@ -339,13 +319,21 @@ class TodoApplication:
         priority = self.priority_var.get()
         reminder = 1 if self.reminder_var.get() else 0
         
-        self.cursor.execute('''
-            INSERT INTO todos (task, due_date, due_time, priority, reminder_enabled, week_day)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (task, due_date, due_time, priority, reminder, week_day))
-        
-        self.connection.commit()
-        self.refresh_tasks()
+        frequency = REPEAT_OPTIONS[self.repeat_var.get()]
+        if frequency:
+            if not due_date:
+                messagebox.showerror("Repeat Error", "Recurring tasks need a due date to start from!")
+                return
+            weekdays = [day for day, var in enumerate(self.weekday_vars) if var.get()]
+            try:
+                interval = int(self.interval_var.get()) if frequency == "interval" else 1
+            except ValueError:
+                messagebox.showerror("Repeat Error", "Repeat interval must be a number of days!")
+                return
+            self.after_write(self.store.add_series(task, due_date, due_time, priority, reminder,
+                                                   frequency, interval, weekdays))
+        else:
+            self.after_write(self.store.add_task(task, due_date, due_time, priority, reminder, week_day))
         self.clear_form()
         messagebox.showinfo("Success", "Task added successfully!")
         
@@ -387,13 +375,8 @@ class TodoApplication:
         priority = self.priority_var.get()
         reminder = 1 if self.reminder_var.get() else 0
         
-        self.cursor.execute('''
-            UPDATE todos SET task=?, due_date=?, due_time=?, priority=?, 
-            reminder_enabled=?, week_day=? WHERE id=?
-        ''', (task, due_date, due_time, priority, reminder, week_day, self.selected_task_id))
-        
-        self.connection.commit()
-        self.refresh_tasks()
+        self.after_write(self.store.update_task(self.selected_task_id, task, due_date, due_time,
+                                                priority, reminder, week_day))
         self.clear_form()
         messagebox.showinfo("Success", "Task updated successfully!")
         
@@ -403,9 +386,7 @@ class TodoApplication:
             messagebox.showwarning("Selection Error", "Please select a task to complete!")
             return
             
-        self.cursor.execute("UPDATE todos SET status='Completed' WHERE id=?", (self.selected_task_id,))
-        self.connection.commit()
-        self.refresh_tasks()
+        self.after_write(self.store.complete_task(self.selected_task_id))
         self.clear_form()
         messagebox.showinfo("Success", "Task marked as completed!")
         
@@ -415,13 +396,108 @@ class TodoApplication:
             messagebox.showwarning("Selection Error", "Please select a task to delete!")
             return
             
+        if self.selected_series_id:
+            answer = messagebox.askyesnocancel(
+                "Delete Recurring Task",
+                "This task repeats.\n\nYes: delete the whole series\nNo: skip only this occurrence")
+            if answer is None:
+                return
+            if answer:
+                self.after_write(self.store.end_series(self.selected_series_id))
+            else:
+                self.after_write(self.store.delete_task(self.selected_task_id))
+            self.clear_form()
+            messagebox.showinfo("Success", "Task deleted successfully!")
+            return
+            
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this task?"):
-            self.cursor.execute("DELETE FROM todos WHERE id=?", (self.selected_task_id,))
-            self.connection.commit()
-            self.refresh_tasks()
+            self.after_write(self.store.delete_task(self.selected_task_id))
             self.clear_form()
             messagebox.showinfo("Success", "Task deleted successfully!")
             
+    def after_write(self, future):
+        """Update the list and reminders on the Tk thread once a queued write commits"""
+        future.add_done_callback(lambda done: self.root.after(0, self.task_written, done))
+        
+    def task_written(self, done):
+        """Apply committed task changes to the list and the reminder schedule"""
+        try:
+            result = done.result()
+        except sqlite3.Error as error:
+            messagebox.showerror("Database Error", f"Unable to save task: {error}")
+            self.refresh_tasks()
+            return
+        # Writes yield one task id, or a list when a recurring series moved on
+        for task_id in (result if isinstance(result, list) else [result]):
+            if task_id is not None:
+                self.reminders.task_changed(task_id)
+                self.task_list.apply_change(task_id)
+        
+    def undo(self):
+        """Revert the latest task change made in this window"""
+        future = self.store.undo()
+        future.add_done_callback(lambda done: self.root.after(0, self.reverted, done))
+        
+    def redo(self):
+        """Re-apply the latest undone change"""
+        future = self.store.redo()
+        future.add_done_callback(lambda done: self.root.after(0, self.reverted, done))
+        
+    def history_shortcut(self, event, command):
+        """Run undo or redo from the keyboard, unless a text field has the focus"""
+        # There Ctrl+Z / Ctrl+Y edit the text; reverting a saved task would surprise the user
+        if not isinstance(event.widget, (tk.Entry, tk.Text, tk.Spinbox)):
+            command()
+        
+    def reverted(self, done):
+        """Apply an undo or redo, or say why there was nothing to revert"""
+        if isinstance(done.exception(), ValueError):
+            messagebox.showinfo("Undo", str(done.exception()))
+            return
+        self.task_written(done)
+        
+    def import_tasks(self):
+        """Bulk-import tasks from a CSV or JSON Lines file in one transaction"""
+        path = filedialog.askopenfilename(title="Import Tasks", filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        future = todo_transfer.import_tasks(self.store, path)
+        future.add_done_callback(lambda done: self.root.after(0, self.import_finished, done))
+        
+    def import_finished(self, done):
+        """Refresh once and report after a bulk import commits"""
+        try:
+            report = done.result()
+        except Exception as error:
+            messagebox.showerror("Import Error", f"Unable to import tasks: {error}")
+            return
+        
+        self.refresh_tasks()
+        self.reminders.reload()
+        message = f"Imported {report['imported']} tasks."
+        if report["rejected"]:
+            message += f"\n\nSkipped {report['rejected']} invalid rows:\n" + "\n".join(report["errors"])
+        messagebox.showinfo("Import Complete", message)
+        
+    def export_tasks(self):
+        """Stream all tasks to a CSV or JSON Lines file in the background"""
+        path = filedialog.asksaveasfilename(title="Export Tasks", defaultextension=".csv",
+                                            filetypes=TRANSFER_FILETYPES)
+        if not path:
+            return
+        
+        def export():
+            try:
+                count = todo_transfer.export_tasks(self.store, path)
+                self.root.after(0, messagebox.showinfo, "Export Complete", f"Exported {count} tasks.")
+            except Exception as error:
+                self.root.after(0, messagebox.showerror, "Export Error", f"Unable to export tasks: {error}")
+            finally:
+                # Each export runs on a new thread; do not leave its connection open
+                self.store.release_reader()
+        
+        threading.Thread(target=export, daemon=True).start()
+        
     def clear_form(self):
         """Clear all input fields"""
         self.task_text.delete("1.0", tk.END)
@@ -431,102 +507,59 @@ class TodoApplication:
         self.ampm_var.set("PM")
         self.priority_var.set("Medium")
         self.reminder_var.set(False)
+        self.repeat_var.set("None")
+        self.interval_var.set("2")
+        for var in self.weekday_vars:
+            var.set(False)
         self.selected_task_id = None
+        self.selected_series_id = None
         
     def refresh_tasks(self):
-        """Refresh task list display"""
-        self.task_listbox.delete(0, tk.END)
+        """Reload the visible part of the task list from the database"""
+        self.task_list.reload()
         
-        query = "SELECT * FROM todos ORDER BY priority DESC, due_date ASC, due_time ASC"
-        self.cursor.execute(query)
-        tasks = self.cursor.fetchall()
-        
-        for task in tasks:
-            task_id, description, due_date, due_time, priority, status, reminder, created_at, week_day = task
-            
-            # Format display
-            status_icon = "✅" if status == "Completed" else "⏳"
-            priority_icon = {"Low": "🔵", "Medium": "🟡", "High": "🟠", "Critical": "🔴"}.get(priority, "⚪")
-            reminder_icon = "🔔" if reminder else ""
-            
-            # Format time for display (convert back to 12-hour)
-            time_display = ""
-            if due_time:
-                try:
-                    time_obj = datetime.datetime.strptime(due_time, "%H:%M")
-                    time_display = time_obj.strftime("%I:%M %p")
-                except ValueError:
-                    time_display = due_time
-            
-            due_info = ""
-            if due_date:
-                due_info = f" | {due_date}"
-                if week_day:
-                    due_info += f" ({week_day})"
-                if time_display:
-                    due_info += f" {time_display}"
-            
-            display_text = f"{status_icon} {priority_icon} {description[:50]}{'...' if len(description) > 50 else ''}{due_info} {reminder_icon}"
-            
-            self.task_listbox.insert(tk.END, f"ID:{task_id} | {display_text}")
-            
     def apply_filter(self, event=None):
         """Apply filter to task list"""
-        filter_type = self.filter_var.get()
-        self.task_listbox.delete(0, tk.END)
-        
-        if filter_type == "All":
-            query = "SELECT * FROM todos ORDER BY priority DESC, due_date ASC"
-        elif filter_type == "Pending":
-            query = "SELECT * FROM todos WHERE status='Pending' ORDER BY priority DESC, due_date ASC"
-        elif filter_type == "Completed":
-            query = "SELECT * FROM todos WHERE status='Completed' ORDER BY created_at DESC"
-        elif filter_type == "High Priority":
-            query = "SELECT * FROM todos WHERE priority IN ('High', 'Critical') ORDER BY priority DESC, due_date ASC"
-        elif filter_type == "Today's Tasks":
-            today = datetime.date.today().strftime("%Y-%m-%d")
-            query = f"SELECT * FROM todos WHERE due_date='{today}' ORDER BY due_time ASC"
-        
-        self.cursor.execute(query)
-        tasks = self.cursor.fetchall()
-        
-        for task in tasks:
-            task_id, description, due_date, due_time, priority, status, reminder, created_at, week_day = task
-            
-            status_icon = "✅" if status == "Completed" else "⏳"
-            priority_icon = {"Low": "🔵", "Medium": "🟡", "High": "🟠", "Critical": "🔴"}.get(priority, "⚪")
-            reminder_icon = "🔔" if reminder else ""
-            
-            time_display = ""
-            if due_time:
-                try:
-                    time_obj = datetime.datetime.strptime(due_time, "%H:%M")
-                    time_display = time_obj.strftime("%I:%M %p")
-                except ValueError:
-                    time_display = due_time
-            
-            due_info = ""
-            if due_date:
-                due_info = f" | {due_date}"
-                if week_day:
-                    due_info += f" ({week_day})"
-                if time_display:
-                    due_info += f" {time_display}"
-            
-            display_text = f"{status_icon} {priority_icon} {description[:50]}{'...' if len(description) > 50 else ''}{due_info} {reminder_icon}"
-            self.task_listbox.insert(tk.END, f"ID:{task_id} | {display_text}")
-            
+        self.task_list.set_filter(self.filter_var.get())
+        
+    def schedule_search(self, *args):
+        """Debounce typing so the search runs once the user pauses"""
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(200, self.run_search)
+        
+    def run_search(self):
+        """Show full-text matches for the search box within the current filter"""
+        self.search_job = None
+        self.task_list.set_search(self.search_var.get())
+        
+    def toggle_archive(self):
+        """Browse and search archived tasks instead of live ones"""
+        self.task_list.set_archived(self.archive_var.get())
+        
+    def archive_tasks(self):
+        """Move old completed tasks to the archive in the background, then reschedule"""
+        def archive():
+            try:
+                self.store.archive_completed()
+            except sqlite3.Error:
+                pass  # retried on the next run
+        
+        # The change watcher picks up the removed rows
+        threading.Thread(target=archive, daemon=True).start()
+        self.root.after(ARCHIVE_EVERY_MS, self.archive_tasks)
+        
     def on_task_select(self, event):
         """Handle task selection to populate form"""
         selection = self.task_listbox.curselection()
         if not selection:
             return
             
-        selected_text = self.task_listbox.get(selection[0])
-        task_id = int(selected_text.split(" | ")[0].replace("ID:", ""))
+        task_id = self.task_list.task_id_at(selection[0])
         
-        self.cursor.execute("SELECT * FROM todos WHERE id=?", (task_id,))
-        task = self.cursor.fetchone()
+        task = self.store.get_task(task_id)
+        # Archived tasks are read-only
+        self.selected_task_id = None
         
         if task:
             self.selected_task_id = task_id
@@ -560,61 +593,71 @@ class TodoApplication:
             self.priority_var.set(task[4])
             self.reminder_var.set(bool(task[6]))
             
+            # Show the series rule; editing a recurring task changes only this occurrence
+            self.selected_series_id = task[11]
+            rule = self.store.get_series_rule(task[11]) if task[11] else None
+            if rule:
+                labels = {code: label for label, code in REPEAT_OPTIONS.items()}
+                self.repeat_var.set(labels[rule.frequency])
+                self.interval_var.set(str(rule.interval_days))
+                for day, var in enumerate(self.weekday_vars):
+                    var.set(rule.frequency == "weekly" and day in rule.weekdays)
+            else:
+                self.repeat_var.set("None")
+            
     def start_reminder_checker(self):
-        """Start background thread for checking reminders"""
-        def check_reminders():
-            while True:
-                try:
-                    now = datetime.datetime.now()
-                    
-                    # Check for tasks due in the next 15 minutes
-                    self.cursor.execute('''
-                        SELECT id, task, due_date, due_time FROM todos 
-                        WHERE reminder_enabled=1 AND status='Pending' 
-                        AND due_date IS NOT NULL
-                    ''')
-                    
-                    reminder_tasks = self.cursor.fetchall()
-                    
-                    for task in reminder_tasks:
-                        task_id, description, due_date, due_time = task
-                        
-                        try:
-                            if due_time:
-                                due_datetime = datetime.datetime.strptime(f"{due_date} {due_time}", "%Y-%m-%d %H:%M")
-                            else:
-                                due_datetime = datetime.datetime.strptime(due_date, "%Y-%m-%d")
-                            
-                            time_diff = (due_datetime - now).total_seconds()
-                            
-                            # Alert if due within 15 minutes (900 seconds)
-                            if 0 <= time_diff <= 900:
-                                self.root.after(0, lambda: messagebox.showinfo(
-                                    "Task Reminder", 
-                                    f"⏰ Upcoming Task!\n\n{description}\n\nDue: {due_date} {due_time if due_time else ''}"
-                                ))
-                                
-                                # Disable reminder after showing
-                                self.cursor.execute("UPDATE todos SET reminder_enabled=0 WHERE id=?", (task_id,))
-                                self.connection.commit()
-                                
-                        except ValueError:
-                            continue
-                    
-                    time.sleep(60)  # Check every minute
-                    
-                except Exception:
-                    time.sleep(60)
-        
-        reminder_thread = threading.Thread(target=check_reminders, daemon=True)
-        reminder_thread.start()
+        """Start the scheduler that fires reminders at their deadlines"""
+        self.reminders = ReminderScheduler(self.store, self.show_reminder)
+        self.reminders.start()
+        
+    def roll_series(self):
+        """Move missed series occurrences to their next date so their reminders fire again"""
+        self.after_write(self.store.roll_series_forward())
+        self.root.after(SERIES_ROLL_EVERY_MS, self.roll_series)
+        
+    def start_change_watcher(self):
+        """Remember where the change log stands and start polling it"""
+        self.data_version = self.store.data_version()
+        self.change_seq = self.store.last_change()
+        self.root.after(CHANGE_POLL_MS, self.watch_changes)
+        
+    def watch_changes(self):
+        """Pull tasks changed by other windows or scripts into the list and reminders"""
+        # data_version is a cheap in-memory check; the log is only read after a commit
+        try:
+            version = self.store.data_version()
+            if version != self.data_version:
+                self.data_version = version
+                self.change_seq, task_ids = self.store.changes_since(self.change_seq)
+                if task_ids is None:
+                    self.refresh_tasks()
+                    self.reminders.reload()
+                else:
+                    # Our own writes show up here too; apply_change skips what it already applied
+                    for task_id in task_ids:
+                        self.reminders.task_changed(task_id)
+                        self.task_list.apply_change(task_id)
+        except sqlite3.Error:
+            pass  # e.g. briefly locked; the next tick catches up
+        self.root.after(CHANGE_POLL_MS, self.watch_changes)
+        
+    def show_reminder(self, task_id, description, due_date, due_time):
+        """Pop up a reminder; called from the scheduler thread"""
+        self.root.after(0, lambda: messagebox.showinfo(
+            "Task Reminder", 
+            f"⏰ Upcoming Task!\n\n{description}\n\nDue: {due_date} {due_time if due_time else ''}"
+        ))
+        
+        # Disable reminder after showing
+        self.after_write(self.store.disable_reminder(task_id))
         
     def run(self):
         """Start the application"""
         try:
             self.root.mainloop()
         finally:
-            self.connection.close()
+            self.reminders.stop()
+            self.store.close()
 
 # Create and run the application
 if __name__ == "__main__":
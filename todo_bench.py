@@ -0,0 +1,191 @@
+"""Headless benchmark of the to-do manager's data paths on synthetic databases.
+
+    python todo_bench.py --sizes 1000 100000 1000000 --repeat 50 --out bench.json
+
+Each path runs the same queries and row formatting as the GUI, against an
+in-memory stand-in for the listbox, and is reported as p50/p99 milliseconds
+plus the tracemalloc peak of one extra, separately traced run.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import todo_widgets
+from todo_store import TaskStore, TASK_FILTERS, PRIORITY_RANKS, parse_due
+from todo_format import TaskFormatter
+from todo_reminders import ReminderScheduler
+
+WORDS = ("report", "call", "email", "review", "invoice", "meeting", "groceries", "deploy",
+         "backup", "dentist", "budget", "draft", "plan", "fix", "order", "pay")
+
+
+class FakeWidget:
+    """Just enough of tk.Listbox / tk.Scrollbar for VirtualTaskList, without a display"""
+
+    def __init__(self, parent=None, **options):
+        self.items = []
+        self.height = options.get('height', 20)
+
+    def pack(self, **options):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def winfo_height(self):
+        return 1
+
+    def bbox(self, index):
+        return None
+
+    def cget(self, option):
+        return self.height
+
+    def delete(self, first, last=None):
+        del self.items[first:(first if last is None else last) + 1]
+
+    def insert(self, index, *items):
+        self.items[index:index] = items
+
+    def set(self, *args):
+        pass
+
+
+def generate(path, size, seed=1, completed=0.4, reminders=0.1, undated=0.1, span_days=365):
+    """Create a synthetic task database; due dates spread evenly around today"""
+    TaskStore(path).close()   # creates the current schema
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    priorities = list(PRIORITY_RANKS)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    batch = []
+    for number in range(size):
+        task = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f" #{number}"
+        if rng.random() < undated:
+            due_date = due_time = week_day = ""
+        else:
+            day = today + datetime.timedelta(days=rng.randint(-span_days // 2, span_days // 2))
+            due_date, week_day = day.isoformat(), day.strftime("%A")
+            due_time = f"{rng.randint(0, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+        priority = rng.choice(priorities)
+        status = "Completed" if rng.random() < completed else "Pending"
+        batch.append((task, due_date, due_time, parse_due(due_date, due_time), priority,
+                      PRIORITY_RANKS[priority], status, int(rng.random() < reminders), week_day))
+        if len(batch) == 10000 or number == size - 1:
+            connection.executemany('''
+                INSERT INTO todos (task, due_date, due_time, due_ts, priority, priority_rank,
+                                   status, reminder_enabled, week_day)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+            batch = []
+    connection.commit()
+    connection.execute("ANALYZE")
+    connection.close()
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def build_paths(store, task_list, rng, max_id):
+    """Name -> callable for every measured path, mirroring the GUI handlers"""
+    paths = {"refresh_tasks": task_list.reload}
+    for filter_type in TASK_FILTERS:
+        paths[f"apply_filter[{filter_type}]"] = (
+            lambda filter_type=filter_type: task_list.set_filter(filter_type))
+    paths["scroll_page"] = lambda: task_list.scroll_by(1, 'pages')
+    paths["scrollbar_jump"] = lambda: task_list.on_scrollbar('moveto', str(rng.random()))
+    paths["search"] = lambda: task_list.set_search(rng.choice(WORDS))
+
+    def select():
+        # on_task_select: one row by id plus its series rule
+        task = store.get_task(rng.randint(1, max_id))
+        if task and task[11]:
+            store.get_series_rule(task[11])
+    paths["on_task_select"] = select
+
+    scheduler = ReminderScheduler(store, lambda *reminder: None)
+    paths["reminder_scan"] = scheduler.reload
+    return paths
+
+
+def measure(path, repeat):
+    """Time repeat calls and trace one more for peak memory"""
+    path()   # warm caches the way a running app would have them
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path()
+        samples.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    path()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"p50_ms": round(percentile(samples, 0.5), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+            "peak_kib": round(peak / 1024, 1)}
+
+
+def run_size(size, args):
+    """Benchmark every path against one database size"""
+    path = os.path.join(args.dir, f"todo_bench_{size}_{args.seed}_{args.completed}_{args.reminders}.db")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate(path, size, args.seed, args.completed, args.reminders)
+        print(f"generated {size} tasks in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    store = TaskStore(path)
+    try:
+        # VirtualTaskList only needs listbox-shaped objects, so no display is required
+        task_list = todo_widgets.VirtualTaskList(None, store, TaskFormatter(), listbox_class=FakeWidget,
+                                                 scrollbar_class=FakeWidget, height=20)
+        rng = random.Random(args.seed)
+        max_id = store.query("SELECT COALESCE(MAX(id), 1) FROM todos")[0][0]
+        results = {}
+        for name, call in build_paths(store, task_list, rng, max_id).items():
+            task_list.set_search("")
+            task_list.set_filter("All")
+            results[name] = measure(call, args.repeat)
+        return results
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    """Parse options, run every size and print or write the JSON report"""
+    parser = argparse.ArgumentParser(description="Benchmark the to-do manager's data paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per path")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--completed", type=float, default=0.4, help="share of completed tasks")
+    parser.add_argument("--reminders", type=float, default=0.1, help="share with reminders")
+    parser.add_argument("--dir", default=tempfile.gettempdir(),
+                        help="where generated databases are cached")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "sqlite": sqlite3.sqlite_version,
+              "repeat": args.repeat, "results": {}}
+    for size in args.sizes:
+        report["results"][str(size)] = run_size(size, args)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
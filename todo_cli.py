@@ -0,0 +1,204 @@
+"""Command-line front end for the to-do database; never imports tkinter.
+
+    python todo_cli.py add "Pay rent" --date 2026-11-01 --time 09:00 --priority High --remind
+    python todo_cli.py list --filter Pending
+    python todo_cli.py done 12 13
+    python todo_cli.py rm 14
+    python todo_cli.py due --within 1h
+    python todo_cli.py import tasks.csv
+    python todo_cli.py export tasks.jsonl
+    python todo_cli.py stats [--rebuild]
+    python todo_cli.py archive --days 30
+    python todo_cli.py list --archived --search report
+    python todo_cli.py journal --since 1200 > changes.jsonl
+"""
+import argparse
+import json
+import sqlite3
+import sys
+
+from todo_store import TaskStore, TASK_FILTERS, PRIORITY_RANKS, DB_FILE, ARCHIVE_AFTER_DAYS
+from todo_format import format_task
+
+# Suffixes accepted by --within
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """Turn '90s', '15m', '1h' or '2d' (bare numbers are minutes) into seconds"""
+    text = text.strip().lower()
+    unit = DURATION_UNITS.get(text[-1:])
+    number = text[:-1] if unit else text
+    if not number.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid duration {text!r}, use e.g. 30m, 1h or 2d")
+    return int(number) * (unit or 60)
+
+
+def print_tasks(rows):
+    """Print one formatted line per task row"""
+    for row in rows:
+        print(format_task(row))
+
+
+def add(store, args):
+    """Add one task and print its id"""
+    # Same validation as file imports, so the CLI cannot store what the importer would reject
+    from todo_transfer import validate_record
+    record = {"task": args.task, "due_date": args.date, "due_time": args.time,
+              "priority": args.priority, "reminder_enabled": "1" if args.remind else "0"}
+    task, due_date, due_time, priority, _, reminder, week_day, _ = validate_record(record)
+    task_id = store.add_task(task, due_date, due_time, priority, reminder, week_day).result()
+    print(task_id)
+
+
+def list_tasks(store, args):
+    """Print a filter, or search results within it"""
+    if args.archived:
+        print_tasks(store.search_archive(args.search or ""))
+    elif args.search:
+        print_tasks(store.search_tasks(args.search, args.filter))
+    else:
+        print_tasks(store.list_tasks(args.filter))
+
+
+def done(store, args):
+    """Complete tasks by id"""
+    for task_id in checked_ids(store, args.ids):
+        store.complete_task(task_id).result()
+
+
+def remove(store, args):
+    """Delete tasks by id"""
+    for task_id in checked_ids(store, args.ids):
+        store.delete_task(task_id).result()
+
+
+def due(store, args):
+    """Print pending tasks due within the window"""
+    print_tasks(store.due_within(args.within))
+
+
+def import_file(store, args):
+    """Import a CSV or JSONL file and report rejected rows"""
+    from todo_transfer import import_tasks
+    report = import_tasks(store, args.path).result()
+    print(f"imported {report['imported']}, rejected {report['rejected']}")
+    for error in report["errors"]:
+        print(error, file=sys.stderr)
+
+
+def export_file(store, args):
+    """Export every task to a CSV or JSONL file"""
+    from todo_transfer import export_tasks
+    print(f"exported {export_tasks(store, args.path)}")
+
+
+def archive(store, args):
+    """Move tasks completed more than --days ago into the archive"""
+    print(f"archived {store.archive_completed(args.days)}")
+
+
+def journal(store, args):
+    """Print journal entries after a sequence number as JSON Lines"""
+    for entry in store.journal_since(args.since):
+        print(json.dumps(entry, ensure_ascii=False))
+
+
+def show_stats(store, args):
+    """Print the dashboard counts, rebuilding the summary first if asked"""
+    if args.rebuild:
+        store.rebuild_stats().result()
+    stats = store.stats()
+    for status in ("Pending", "Completed"):
+        print(f"{status.lower()}: {stats['status'].get(status, 0)}")
+    print(f"due today: {stats['due_today']}")
+    print(f"overdue: {stats['overdue']}")
+    for priority in ("Critical", "High", "Medium", "Low"):
+        print(f"pending {priority.lower()}: {stats['priority'].get(priority, 0)}")
+    for day, count in stats["completed"].items():
+        print(f"completed {day}: {count}")
+
+
+def checked_ids(store, ids):
+    """Fail before writing anything if one of the ids does not exist"""
+    missing = [str(task_id) for task_id in ids if store.get_task(task_id) is None]
+    if missing:
+        raise ValueError(f"no task with id {', '.join(missing)}")
+    return ids
+
+
+def build_parser():
+    """Argument parser with one subcommand per action"""
+    parser = argparse.ArgumentParser(prog="todo_cli.py", description="Headless to-do manager")
+    parser.add_argument("--db", default=DB_FILE, help=f"database file (default {DB_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("add", help="add a task and print its id")
+    command.add_argument("task")
+    command.add_argument("--date", default="", help="due date, YYYY-MM-DD")
+    command.add_argument("--time", default="", help="due time, 24-hour HH:MM")
+    command.add_argument("--priority", default="Medium", choices=list(PRIORITY_RANKS))
+    command.add_argument("--remind", action="store_true", help="enable the GUI reminder")
+    command.set_defaults(run=add)
+
+    command = commands.add_parser("list", help="list tasks")
+    command.add_argument("--filter", default="All", choices=list(TASK_FILTERS))
+    command.add_argument("--search", help="only tasks whose description matches these words")
+    command.add_argument("--archived", action="store_true",
+                         help="list archived tasks, latest first, instead of live ones")
+    command.set_defaults(run=list_tasks)
+
+    command = commands.add_parser("done", help="mark tasks completed")
+    command.add_argument("ids", type=int, nargs="+")
+    command.set_defaults(run=done)
+
+    command = commands.add_parser("rm", help="delete tasks")
+    command.add_argument("ids", type=int, nargs="+")
+    command.set_defaults(run=remove)
+
+    command = commands.add_parser("due", help="list pending tasks due soon")
+    command.add_argument("--within", type=parse_duration, default="1h",
+                         help="time window such as 30m, 1h or 2d (default 1h)")
+    command.set_defaults(run=due)
+
+    command = commands.add_parser("import", help="import tasks from CSV or JSON Lines")
+    command.add_argument("path")
+    command.set_defaults(run=import_file)
+
+    command = commands.add_parser("export", help="export all tasks to CSV or JSON Lines")
+    command.add_argument("path")
+    command.set_defaults(run=export_file)
+
+    command = commands.add_parser("archive", help="archive old completed tasks")
+    command.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                         help=f"completed more than this many days ago (default {ARCHIVE_AFTER_DAYS})")
+    command.set_defaults(run=archive)
+
+    command = commands.add_parser("journal", help="export changes after a journal sequence number")
+    command.add_argument("--since", type=int, default=0,
+                         help="last sequence number already synced (default 0, everything)")
+    command.set_defaults(run=journal)
+
+    command = commands.add_parser("stats", help="print task statistics")
+    command.add_argument("--rebuild", action="store_true",
+                         help="recompute the summary table from the tasks first")
+    command.set_defaults(run=show_stats)
+    return parser
+
+
+def main(argv=None):
+    """Run one command and return the process exit code"""
+    args = build_parser().parse_args(argv)
+    store = TaskStore(args.db)
+    try:
+        args.run(store, args)
+    except (ValueError, OSError, sqlite3.Error) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
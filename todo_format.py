@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+import perf_monitor
+
+PRIORITY_ICONS = {"Low": "🔵", "Medium": "🟡", "High": "🟠", "Critical": "🔴"}
+
+
+def twelve_hour(due_time):
+    """Turn a stored HH:MM time into the 12-hour form the list shows"""
+    hour, _, minute = due_time.partition(":")
+    if not (hour.isdigit() and minute.isdigit()):
+        return due_time
+    hour = int(hour)
+    return f"{(hour % 12) or 12:02d}:{minute} {'PM' if hour >= 12 else 'AM'}"
+
+
+def format_task(task):
+    """Build the listbox line for one task row"""
+    task_id, description, due_date, due_time, priority, status, reminder, created_at, week_day, due_ts = task[:10]
+    series_id = task[11]
+
+    # Format display
+    status_icon = "✅" if status == "Completed" else "⏳"
+    priority_icon = PRIORITY_ICONS.get(priority, "⚪")
+    reminder_icon = "🔔" if reminder else ""
+    if series_id:
+        reminder_icon += "🔁"
+
+    # Format time for display (convert back to 12-hour)
+    # (string arithmetic: strptime/strftime cost more than the rest of the row)
+    time_display = ""
+    if due_time:
+        time_display = twelve_hour(due_time) if due_ts is not None else due_time
+
+    due_info = ""
+    if due_date:
+        due_info = f" | {due_date}"
+        if week_day:
+            due_info += f" ({week_day})"
+        if time_display:
+            due_info += f" {time_display}"
+
+    display_text = f"{status_icon} {priority_icon} {description[:50]}{'...' if len(description) > 50 else ''}{due_info} {reminder_icon}"
+    return f"ID:{task_id} | {display_text}"
+
+
+class TaskFormatter:
+    """format_task with an LRU cache keyed on (task id, row version)"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    @perf_monitor.timed("format.task_row")
+    def __call__(self, task):
+        # Every UPDATE bumps todos.version, so a key never maps to stale text
+        key = (task[0], task[12])
+        text = self.cache.get(key)
+        if text is None:
+            text = format_task(task)
+            self.cache[key] = text
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return text
@@ -0,0 +1,65 @@
+import calendar
+import datetime
+
+# Labels offered by the form, mapped to stored frequency codes
+REPEAT_OPTIONS = {"None": None, "Daily": "daily", "Weekly": "weekly",
+                  "Monthly": "monthly", "Every N days": "interval"}
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class RecurrenceRule:
+    """When a task series repeats; occurrences are computed on demand, never stored"""
+
+    def __init__(self, frequency, start_date, interval_days=1, weekdays=(), month_day=None,
+                 end_date=None):
+        if frequency not in REPEAT_OPTIONS.values() or frequency is None:
+            raise ValueError(f"unknown frequency {frequency!r}")
+        self.frequency = frequency
+        self.start_date = start_date
+        self.interval_days = max(1, int(interval_days or 1))
+        self.weekdays = sorted(set(weekdays)) or [start_date.weekday()]
+        self.month_day = month_day or start_date.day
+        self.end_date = end_date
+
+    @classmethod
+    def from_series(cls, frequency, start_date, interval_days, weekdays, month_day, end_date):
+        """Build a rule from the text columns of a task_series row"""
+        return cls(frequency, datetime.date.fromisoformat(start_date), interval_days,
+                   [int(day) for day in weekdays.split(",") if day] if weekdays else (),
+                   month_day, datetime.date.fromisoformat(end_date) if end_date else None)
+
+    def occurrences(self, first, last=None):
+        """Yield occurrence dates from first to last (inclusive), lazily and in order"""
+        day = max(first, self.start_date)
+        if self.end_date:
+            last = min(last, self.end_date) if last else self.end_date
+        one_day = datetime.timedelta(days=1)
+
+        if self.frequency in ("daily", "interval"):
+            step = 1 if self.frequency == "daily" else self.interval_days
+            # Snap forward onto the start_date + k * step grid
+            day += datetime.timedelta(days=-(day - self.start_date).days % step)
+            while last is None or day <= last:
+                yield day
+                day += datetime.timedelta(days=step)
+
+        elif self.frequency == "weekly":
+            while last is None or day <= last:
+                if day.weekday() in self.weekdays:
+                    yield day
+                day += one_day
+
+        else:
+            year, month = day.year, day.month
+            while True:
+                days_in_month = calendar.monthrange(year, month)[1]
+                candidate = datetime.date(year, month, min(self.month_day, days_in_month))
+                if last is not None and candidate > last:
+                    return
+                if candidate >= day:
+                    yield candidate
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def next_after(self, day):
+        """First occurrence strictly after day, or None once the series has ended"""
+        return next(self.occurrences(day + datetime.timedelta(days=1)), None)
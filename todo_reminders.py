@@ -0,0 +1,99 @@
+import heapq
+import threading
+import time
+
+# Reminders pop up this many seconds before the task is due
+REMINDER_LEAD_SECONDS = 900
+
+
+class ReminderScheduler:
+    """Fires task reminders at their deadlines from a min-heap of due times"""
+
+    def __init__(self, store, on_due, lead_seconds=REMINDER_LEAD_SECONDS):
+        self.store = store
+        self.on_due = on_due
+        self.lead_seconds = lead_seconds
+        self.heap = []        # (fire_at, task_id), may hold stale entries
+        self.scheduled = {}   # task_id -> (fire_at, description, due_date, due_time)
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Load upcoming reminders once and start the scheduler thread"""
+        rows = self.store.reminder_candidates()
+        with self.condition:
+            for row in rows:
+                self.schedule(*row)
+            self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Wake the scheduler thread and let it exit"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def reload(self):
+        """Rebuild the schedule from the database, e.g. after a bulk import"""
+        rows = self.store.reminder_candidates()
+        with self.condition:
+            self.heap = []
+            self.scheduled = {}
+            for row in rows:
+                self.schedule(*row)
+            self.condition.notify()
+
+    def task_changed(self, task_id):
+        """Reschedule one task after it was added, edited, completed or deleted"""
+        row = self.store.get_reminder(task_id)
+        with self.condition:
+            self.scheduled.pop(task_id, None)
+            if row:
+                self.schedule(*row)
+            self.condition.notify()
+
+    def schedule(self, task_id, description, due_date, due_time, due_ts):
+        """Push a reminder onto the heap; caller holds the condition"""
+        if due_ts is None or due_ts < time.time():
+            return
+        fire_at = due_ts - self.lead_seconds
+        self.scheduled[task_id] = (fire_at, description, due_date, due_time)
+        heapq.heappush(self.heap, (fire_at, task_id))
+
+        # Rescheduling leaves stale entries behind; compact before they pile up
+        if len(self.heap) > 2 * len(self.scheduled) + 64:
+            self.heap = [(entry[0], key) for key, entry in self.scheduled.items()]
+            heapq.heapify(self.heap)
+
+    def pop_due(self):
+        """Remove and return every live reminder whose time has come"""
+        now = time.time()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, task_id = heapq.heappop(self.heap)
+            entry = self.scheduled.get(task_id)
+            if entry is None or entry[0] != fire_at:
+                continue
+            del self.scheduled[task_id]
+            due.append((task_id,) + entry[1:])
+        return due
+
+    def run(self):
+        """Sleep until the earliest deadline or until the schedule changes"""
+        while True:
+            with self.condition:
+                due = self.pop_due()
+                while self.running and not due:
+                    timeout = self.heap[0][0] - time.time() if self.heap else None
+                    self.condition.wait(timeout)
+                    due = self.pop_due()
+                if not self.running:
+                    return
+
+            for reminder in due:
+                try:
+                    self.on_due(*reminder)
+                except Exception:
+                    continue
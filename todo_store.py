@@ -0,0 +1,1224 @@
+import re
+import json
+import sqlite3
+import threading
+import queue
+import concurrent.futures
+import datetime
+import calendar
+import time
+
+import perf_monitor
+from todo_recurrence import RecurrenceRule
+
+DB_FILE = 'todo_tasks.db'
+
+# Column order every query returns, independent of how the table was migrated
+TASK_COLUMNS = ("id", "task", "due_date", "due_time", "priority", "status",
+                "reminder_enabled", "created_at", "week_day", "due_ts", "priority_rank",
+                "series_id", "version")
+SELECT_TASKS = f"SELECT {', '.join(TASK_COLUMNS)} FROM todos"
+
+# Numeric ordering for priorities; unknown values sort below "Low"
+PRIORITY_RANKS = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
+PRIORITY_RANK_SQL = "CASE {} " + " ".join(
+    f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITY_RANKS.items()) + " ELSE 0 END"
+
+# SQL twin of parse_due(): the 'utc' modifier reads the text as local time
+DUE_TS_SQL = ("CAST(strftime('%s', {0}.due_date || ' ' || "
+              "COALESCE(NULLIF({0}.due_time, ''), '00:00'), 'utc') AS INTEGER)")
+
+# Filter name -> (WHERE clause, sort keys); each sort key is (column, descending).
+# The trailing id key makes the order total so pages can resume after any row.
+BY_PRIORITY = (("priority_rank", True), ("due_ts", False), ("id", False))
+BY_DUE = (("due_ts", False), ("id", False))
+TASK_FILTERS = {
+    "All": ("", BY_PRIORITY),
+    "Pending": ("status='Pending'", BY_PRIORITY),
+    "Completed": ("status='Completed'", (("created_at", True), ("id", True))),
+    "High Priority": ("priority_rank >= 3", BY_PRIORITY),
+    "Today's Tasks": ("due_ts BETWEEN :day_start AND :day_end", BY_DUE),
+    "Overdue": ("status='Pending' AND due_ts < :now", BY_DUE),
+}
+# Per-day completion counts over a source of completed_at values
+COMPLETED_STATS = ("INSERT INTO todo_stats SELECT 'completed', date(completed_at, 'localtime'), COUNT(*) "
+                   "FROM ({}) WHERE completed_at IS NOT NULL GROUP BY 2")
+# Recompute todo_stats from scratch. Archived tasks keep completed_at, so their days survive;
+# only completions of since-deleted tasks cannot be recovered
+REBUILD_STATS = (
+    "DELETE FROM todo_stats",
+    "INSERT INTO todo_stats SELECT 'status', COALESCE(status, ''), COUNT(*) FROM todos GROUP BY 2",
+    "INSERT INTO todo_stats SELECT 'priority', COALESCE(priority, ''), COUNT(*) FROM todos "
+    "WHERE status = 'Pending' GROUP BY 2",
+    "INSERT INTO todo_stats SELECT 'due', due_date, COUNT(*) FROM todos "
+    "WHERE status = 'Pending' AND due_date <> '' GROUP BY 2",
+    COMPLETED_STATS.format("SELECT completed_at FROM todos "
+                           "UNION ALL SELECT completed_at FROM todos_archive"),
+)
+# Completed tasks move to todos_archive this many days after completion
+ARCHIVE_AFTER_DAYS = 30
+# Columns carried over to todos_archive, which keeps the original ids
+ARCHIVE_COLUMNS = TASK_COLUMNS + ("occurrence_date", "completed_at")
+
+# Journaled tables and the columns a delta may carry; "version" is never restored
+JOURNAL_TABLES = {
+    "todos": ARCHIVE_COLUMNS,
+    "task_series": ("id", "task", "due_time", "priority", "reminder_enabled", "frequency",
+                    "interval_days", "weekdays", "month_day", "start_date", "end_date",
+                    "created_at"),
+}
+# Undo steps remembered per session
+UNDO_LIMIT = 100
+
+# Change-log rows kept for clients catching up; older ones are pruned
+CHANGE_LOG_SIZE = 10000
+# Days of completion history the dashboard shows
+STATS_HISTORY_DAYS = 90
+
+# Sort columns that may hold NULL; SQLite orders NULL before any value
+NULLABLE_COLUMNS = {"due_ts"}
+
+
+def parse_due(due_date, due_time):
+    """Return a task's local due moment as epoch seconds, or None if unset"""
+    if not due_date:
+        return None
+    try:
+        # fromisoformat is an order of magnitude cheaper than strptime
+        due = datetime.datetime.fromisoformat(f"{due_date} {due_time or '00:00'}")
+    except ValueError:
+        return None
+    return int(due.timestamp())
+
+
+def day_bounds(day):
+    """Return the first and last epoch second of a local calendar day"""
+    start = datetime.datetime.combine(day, datetime.time())
+    return int(start.timestamp()), int((start + datetime.timedelta(days=1)).timestamp()) - 1
+
+
+def stats_upserts(row, sign):
+    """Trigger statements adding sign to every summary bucket the NEW or OLD row falls in"""
+    upsert = ("INSERT INTO todo_stats (bucket, key, count) SELECT '{0}', {1}, {2} WHERE {3} "
+              "ON CONFLICT (bucket, key) DO UPDATE SET count = count + excluded.count;")
+    pending = f"{row}.status = 'Pending'"
+    return "\n".join([
+        upsert.format("status", f"COALESCE({row}.status, '')", sign, "1"),
+        upsert.format("priority", f"COALESCE({row}.priority, '')", sign, pending),
+        upsert.format("due", f"{row}.due_date", sign, f"{pending} AND {row}.due_date <> ''"),
+    ])
+
+
+def order_clause(keys, reverse=False):
+    """Render sort keys as an ORDER BY list, optionally flipped"""
+    return ", ".join(f"{column} {'DESC' if descending != reverse else 'ASC'}"
+                     for column, descending in keys)
+
+
+def sorts_before(keys, row, other):
+    """True if row comes ahead of other in the order the sort keys define"""
+    for column, descending in keys:
+        index = TASK_COLUMNS.index(column)
+        first, second = row[index], other[index]
+        if first == second:
+            continue
+        # Same rules as SQLite: NULL before any value, text in code point order
+        smaller = first is None or (second is not None and first < second)
+        return smaller != descending
+    return False
+
+
+def keyset_clause(keys, row, before=False):
+    """WHERE clause selecting rows that sort strictly after (or before) row"""
+    clauses = []
+    params = {}
+    equal = []
+    for number, (column, descending) in enumerate(keys):
+        value = row[TASK_COLUMNS.index(column)]
+        name = f"key{number}"
+        params[name] = value
+        # Moving forward on an ASC key means larger values, and NULL is smallest
+        larger = descending == before
+        if value is None:
+            beyond = f"{column} IS NOT NULL" if larger else None
+        elif column in NULLABLE_COLUMNS and not larger:
+            beyond = f"({column} < :{name} OR {column} IS NULL)"
+        else:
+            beyond = f"{column} {'>' if larger else '<'} :{name}"
+        if beyond:
+            clauses.append(" AND ".join(equal + [beyond]))
+        equal.append(f"{column} IS :{name}")
+
+    if not clauses:
+        return "0", params
+    sql = " OR ".join(f"({clause})" for clause in clauses)
+
+    # A redundant bound on the leading key lets SQLite seek instead of scan
+    column, descending = keys[0]
+    if params["key0"] is not None and column not in NULLABLE_COLUMNS:
+        sql = f"{column} {'>=' if descending == before else '<='} :key0 AND ({sql})"
+    return sql, params
+
+
+class TaskDatabase:
+    """WAL-mode SQLite access: a queued single writer plus one reader per thread"""
+
+    def __init__(self, db_path=DB_FILE, setup=None, batch_size=200):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.jobs = queue.Queue()
+        self.local = threading.local()
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        # (on_commit, on_rollback) pairs registered by the jobs of the running batch
+        self.batch_hooks = []
+
+        # Autocommit mode: the writer thread opens and commits its own batches
+        self.writer = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.writer.execute("PRAGMA journal_mode=WAL")
+        self.writer.execute("PRAGMA synchronous=NORMAL")
+        if setup:
+            setup(self.writer)
+
+        self.writer_thread = threading.Thread(target=self.run_writer, daemon=True)
+        self.writer_thread.start()
+
+    def reader(self):
+        """Read-only connection owned by the calling thread"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+            self.local.connection = connection
+            with self.readers_lock:
+                self.readers.append(connection)
+        return connection
+
+    def release_reader(self):
+        """Close the calling thread's reader; short-lived threads call this before exiting"""
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            self.local.connection = None
+            with self.readers_lock:
+                self.readers.remove(connection)
+            connection.close()
+
+    @perf_monitor.timed("db.read")
+    def read(self, sql, params=()):
+        """Run a query on this thread's reader; WAL keeps it from waiting on writes"""
+        return self.reader().execute(sql, params).fetchall()
+
+    def submit(self, job):
+        """Queue job(connection) for the writer thread and return a Future of its result"""
+        future = concurrent.futures.Future()
+        self.jobs.put((job, future))
+        return future
+
+    def on_batch_end(self, on_commit, on_rollback):
+        """From inside a job: call on_commit once its batch commits, or on_rollback if it fails"""
+        self.batch_hooks.append((on_commit, on_rollback))
+
+    def run_writer(self):
+        """Apply queued jobs in batches, one transaction and one commit per batch"""
+        running = True
+        while running:
+            batch = [self.jobs.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = batch[:batch.index(None)]
+            if batch:
+                self.apply_batch(batch)
+
+    @perf_monitor.timed("db.write_batch")
+    def apply_batch(self, batch):
+        """Run a batch of jobs, isolating each in a savepoint so one failure stays local"""
+        outcomes = []
+        self.batch_hooks = []
+        committed = False
+        try:
+            self.writer.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                self.writer.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((future, job(self.writer), None))
+                    self.writer.execute("RELEASE job")
+                except Exception as error:
+                    self.writer.execute("ROLLBACK TO job")
+                    self.writer.execute("RELEASE job")
+                    outcomes.append((future, None, error))
+            self.writer.execute("COMMIT")
+            committed = True
+        except sqlite3.Error as error:
+            # BEGIN, a savepoint rollback or COMMIT failed: drop the whole batch, but keep
+            # the writer thread alive so no queued Future is left waiting forever
+            if self.writer.in_transaction:
+                try:
+                    self.writer.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            outcomes = [(future, None, error) for _, future in batch]
+
+        # In-memory state follows the database before anyone waiting on a Future looks at it
+        for on_commit, on_rollback in self.batch_hooks:
+            (on_commit if committed else on_rollback)()
+        self.batch_hooks = []
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        """Flush queued writes, then close every connection"""
+        self.jobs.put(None)
+        self.writer_thread.join()
+        self.writer.close()
+        with self.readers_lock:
+            for connection in self.readers:
+                connection.close()
+            self.readers = []
+
+
+class TaskStore:
+    """Owns the todos schema and every query made against it"""
+
+    def __init__(self, db_path=DB_FILE):
+        self.db = TaskDatabase(db_path, setup=self.setup_schema)
+        # Journal action numbers of committed changes; only touched from the writer thread
+        self.undo_stack = []
+        self.redo_stack = []
+        # Working copies of both stacks while a write batch runs, see batch_history()
+        self.pending_history = None
+
+    def setup_schema(self, connection):
+        """Create or migrate the todos schema up to the current version"""
+        migrations = [self.create_base_schema, self.add_priority_rank, self.add_due_timestamp,
+                      self.add_full_text_index, self.add_task_series, self.add_row_version,
+                      self.add_due_date_index, self.add_stats_summary, self.add_change_log,
+                      self.add_archive, self.add_journal, self.fix_completed_stats]
+
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        # Migrations are idempotent, so an interrupted one is simply re-run
+        for number, migrate in enumerate(migrations, start=1):
+            if version < number:
+                migrate(connection)
+                connection.execute(f"PRAGMA user_version = {number}")
+
+    def create_base_schema(self, connection):
+        """Migration 1: todos table plus indexes for the list filters and reminders"""
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS todos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                due_date TEXT,
+                due_time TEXT,
+                priority TEXT DEFAULT 'Medium',
+                status TEXT DEFAULT 'Pending',
+                reminder_enabled INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                week_day TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_todos_status_order
+                ON todos (status, priority DESC, due_date, due_time);
+            CREATE INDEX IF NOT EXISTS idx_todos_reminder
+                ON todos (reminder_enabled, status, due_date);
+            CREATE INDEX IF NOT EXISTS idx_todos_order
+                ON todos (priority DESC, due_date, due_time);
+            CREATE INDEX IF NOT EXISTS idx_todos_due
+                ON todos (due_date, due_time);
+            CREATE INDEX IF NOT EXISTS idx_todos_status_created
+                ON todos (status, created_at);
+        ''')
+
+    def add_priority_rank(self, connection):
+        """Migration 2: integer priority_rank so ordering comes from the index"""
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(todos)")]
+        if "priority_rank" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN priority_rank INTEGER DEFAULT 0")
+        rank_of_new = PRIORITY_RANK_SQL.format("NEW.priority")
+        connection.executescript(f'''
+            UPDATE todos SET priority_rank = {PRIORITY_RANK_SQL.format("priority")};
+
+            -- Writers that go through TaskStore set the rank themselves; these
+            -- triggers only fire for rows written some other way
+            CREATE TRIGGER IF NOT EXISTS todos_rank_insert AFTER INSERT ON todos
+            WHEN NEW.priority_rank IS NOT {rank_of_new}
+            BEGIN
+                UPDATE todos SET priority_rank = {rank_of_new} WHERE id = NEW.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_rank_update AFTER UPDATE OF priority, priority_rank ON todos
+            WHEN NEW.priority_rank IS NOT {rank_of_new}
+            BEGIN
+                UPDATE todos SET priority_rank = {rank_of_new} WHERE id = NEW.id;
+            END;
+
+            DROP INDEX IF EXISTS idx_todos_status_order;
+            DROP INDEX IF EXISTS idx_todos_order;
+            CREATE INDEX IF NOT EXISTS idx_todos_status_rank
+                ON todos (status, priority_rank DESC, due_date, due_time);
+            CREATE INDEX IF NOT EXISTS idx_todos_rank
+                ON todos (priority_rank DESC, due_date, due_time);
+        ''')
+
+    def add_due_timestamp(self, connection):
+        """Migration 3: indexed due_ts epoch column replacing per-row strptime"""
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(todos)")]
+        if "due_ts" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN due_ts INTEGER")
+        due_of_new = DUE_TS_SQL.format("NEW")
+        connection.executescript(f'''
+            UPDATE todos SET due_ts = {DUE_TS_SQL.format("todos")};
+
+            CREATE TRIGGER IF NOT EXISTS todos_due_insert AFTER INSERT ON todos
+            WHEN NEW.due_ts IS NOT {due_of_new}
+            BEGIN
+                UPDATE todos SET due_ts = {due_of_new} WHERE id = NEW.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_due_update AFTER UPDATE OF due_date, due_time, due_ts ON todos
+            WHEN NEW.due_ts IS NOT {due_of_new}
+            BEGIN
+                UPDATE todos SET due_ts = {due_of_new} WHERE id = NEW.id;
+            END;
+
+            DROP INDEX IF EXISTS idx_todos_status_rank;
+            DROP INDEX IF EXISTS idx_todos_rank;
+            DROP INDEX IF EXISTS idx_todos_reminder;
+            DROP INDEX IF EXISTS idx_todos_due;
+            CREATE INDEX IF NOT EXISTS idx_todos_status_rank_due
+                ON todos (status, priority_rank DESC, due_ts);
+            CREATE INDEX IF NOT EXISTS idx_todos_rank_due
+                ON todos (priority_rank DESC, due_ts);
+            CREATE INDEX IF NOT EXISTS idx_todos_reminder_due
+                ON todos (reminder_enabled, status, due_ts);
+            CREATE INDEX IF NOT EXISTS idx_todos_status_due
+                ON todos (status, due_ts);
+            CREATE INDEX IF NOT EXISTS idx_todos_due_ts
+                ON todos (due_ts);
+        ''')
+
+    def add_full_text_index(self, connection):
+        """Migration 4: FTS5 index over task descriptions, kept in sync by triggers"""
+        connection.executescript('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+                task, content='todos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            INSERT INTO todos_fts(todos_fts) VALUES ('rebuild');
+
+            CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+                INSERT INTO todos_fts(rowid, task) VALUES (NEW.id, NEW.task);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+                INSERT INTO todos_fts(todos_fts, rowid, task) VALUES ('delete', OLD.id, OLD.task);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF task ON todos BEGIN
+                INSERT INTO todos_fts(todos_fts, rowid, task) VALUES ('delete', OLD.id, OLD.task);
+                INSERT INTO todos_fts(rowid, task) VALUES (NEW.id, NEW.task);
+            END;
+        ''')
+
+    def add_task_series(self, connection):
+        """Migration 5: recurring task series, stored once with one live occurrence row"""
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(todos)")]
+        if "series_id" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN series_id INTEGER")
+        if "occurrence_date" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN occurrence_date TEXT")
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS task_series (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                due_time TEXT,
+                priority TEXT DEFAULT 'Medium',
+                reminder_enabled INTEGER DEFAULT 0,
+                frequency TEXT NOT NULL,
+                interval_days INTEGER DEFAULT 1,
+                weekdays TEXT,
+                month_day INTEGER,
+                start_date TEXT NOT NULL,
+                end_date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_todos_occurrence
+                ON todos (series_id, occurrence_date) WHERE series_id IS NOT NULL;
+        ''')
+
+    def add_row_version(self, connection):
+        """Migration 6: per-row version counter so display caches can tell rows changed"""
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(todos)")]
+        if "version" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN version INTEGER DEFAULT 0")
+        # TaskStore bumps version itself; this catches updates made any other way
+        connection.executescript('''
+            CREATE TRIGGER IF NOT EXISTS todos_version_update AFTER UPDATE ON todos
+            WHEN NEW.version IS OLD.version
+            BEGIN
+                UPDATE todos SET version = OLD.version + 1 WHERE id = NEW.id;
+            END;
+        ''')
+
+    def add_due_date_index(self, connection):
+        """Migration 7: (status, due_date) index so per-day counts never touch the table"""
+        connection.execute('''
+            CREATE INDEX IF NOT EXISTS idx_todos_status_due_date ON todos (status, due_date)
+        ''')
+
+    def add_stats_summary(self, connection):
+        """Migration 8: trigger-maintained todo_stats counts for the dashboard"""
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(todos)")]
+        if "completed_at" not in columns:
+            connection.execute("ALTER TABLE todos ADD COLUMN completed_at TIMESTAMP")
+        # bucket is status / priority / due (pending only) / completed (per local day)
+        connection.executescript(f'''
+            CREATE TABLE IF NOT EXISTS todo_stats (
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (bucket, key)
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS todos_stats_insert AFTER INSERT ON todos
+            BEGIN
+                {stats_upserts("NEW", 1)}
+                INSERT INTO todo_stats (bucket, key, count)
+                SELECT 'completed', date(NEW.completed_at, 'localtime'), 1
+                WHERE NEW.completed_at IS NOT NULL
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_stats_delete AFTER DELETE ON todos
+            BEGIN
+                {stats_upserts("OLD", -1)}
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_stats_update
+            AFTER UPDATE OF status, priority, due_date, completed_at ON todos
+            BEGIN
+                {stats_upserts("OLD", -1)}
+                {stats_upserts("NEW", 1)}
+                INSERT INTO todo_stats (bucket, key, count)
+                SELECT 'completed', date(NEW.completed_at, 'localtime'), 1
+                WHERE NEW.completed_at IS NOT NULL AND NEW.completed_at IS NOT OLD.completed_at
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count + 1;
+            END;
+            -- TaskStore stamps completed_at itself; this covers other writers
+            CREATE TRIGGER IF NOT EXISTS todos_completed_at AFTER UPDATE OF status ON todos
+            WHEN NEW.status = 'Completed' AND NEW.completed_at IS NULL
+            BEGIN
+                UPDATE todos SET completed_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END;
+        ''')
+        # todos_archive only arrives with migration 10, so every completion is still in todos
+        for sql in REBUILD_STATS[:-1] + (COMPLETED_STATS.format("SELECT completed_at FROM todos"),):
+            connection.execute(sql)
+
+    def add_change_log(self, connection):
+        """Migration 9: todo_changes log so other clients can fetch just what changed"""
+        connection.executescript(f'''
+            CREATE TABLE IF NOT EXISTS todo_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS todos_log_insert AFTER INSERT ON todos
+            BEGIN
+                INSERT INTO todo_changes (task_id) VALUES (NEW.id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_log_update AFTER UPDATE ON todos
+            BEGIN
+                INSERT INTO todo_changes (task_id) VALUES (NEW.id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_log_delete AFTER DELETE ON todos
+            BEGIN
+                INSERT INTO todo_changes (task_id) VALUES (OLD.id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todo_changes_prune AFTER INSERT ON todo_changes
+            WHEN NEW.seq % 1000 = 0
+            BEGIN
+                DELETE FROM todo_changes WHERE seq <= NEW.seq - {CHANGE_LOG_SIZE};
+            END;
+        ''')
+
+    def add_archive(self, connection):
+        """Migration 10: cold todos_archive table with its own full-text index"""
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS todos_archive (
+                id INTEGER PRIMARY KEY,
+                task TEXT NOT NULL,
+                due_date TEXT,
+                due_time TEXT,
+                priority TEXT,
+                status TEXT,
+                reminder_enabled INTEGER,
+                created_at TIMESTAMP,
+                week_day TEXT,
+                due_ts INTEGER,
+                priority_rank INTEGER,
+                series_id INTEGER,
+                version INTEGER,
+                occurrence_date TEXT,
+                completed_at TIMESTAMP,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_archive_archived ON todos_archive (archived_at);
+            CREATE INDEX IF NOT EXISTS idx_todos_status_completed ON todos (status, completed_at);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS todos_archive_fts USING fts5(
+                task, content='todos_archive', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS todos_archive_fts_insert AFTER INSERT ON todos_archive BEGIN
+                INSERT INTO todos_archive_fts(rowid, task) VALUES (NEW.id, NEW.task);
+            END;
+            CREATE TRIGGER IF NOT EXISTS todos_archive_fts_delete AFTER DELETE ON todos_archive BEGIN
+                INSERT INTO todos_archive_fts(todos_archive_fts, rowid, task)
+                VALUES ('delete', OLD.id, OLD.task);
+            END;
+        ''')
+
+    def add_journal(self, connection):
+        """Migration 11: append-only todo_journal of row deltas grouped into actions"""
+        # op is insert / update / delete, or archive for rows moved to todos_archive; before
+        # and after are JSON objects of the columns that changed (whole rows otherwise)
+        connection.executescript('''
+            CREATE TABLE IF NOT EXISTS todo_journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                action INTEGER NOT NULL,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                before TEXT,
+                after TEXT,
+                reverts INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_journal_action ON todo_journal (action);
+        ''')
+
+    def fix_completed_stats(self, connection):
+        """Migration 12: take un-completed tasks back out of the completed-per-day counts"""
+        # The migration 8 trigger only ever added to 'completed', so an undone completion
+        # stayed counted; recount just that bucket, archived completions included
+        connection.executescript(f'''
+            DROP TRIGGER IF EXISTS todos_stats_update;
+            CREATE TRIGGER todos_stats_update
+            AFTER UPDATE OF status, priority, due_date, completed_at ON todos
+            BEGIN
+                {stats_upserts("OLD", -1)}
+                {stats_upserts("NEW", 1)}
+                INSERT INTO todo_stats (bucket, key, count)
+                SELECT 'completed', date(OLD.completed_at, 'localtime'), -1
+                WHERE OLD.completed_at IS NOT NULL AND OLD.completed_at IS NOT NEW.completed_at
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count - 1;
+                INSERT INTO todo_stats (bucket, key, count)
+                SELECT 'completed', date(NEW.completed_at, 'localtime'), 1
+                WHERE NEW.completed_at IS NOT NULL AND NEW.completed_at IS NOT OLD.completed_at
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count + 1;
+            END;
+        ''')
+        connection.execute("DELETE FROM todo_stats WHERE bucket = 'completed'")
+        connection.execute(REBUILD_STATS[-1])
+
+    def query(self, sql, params=()):
+        """Run a read query and return all rows"""
+        return self.db.read(sql, params)
+
+    def filter_params(self, day=None):
+        """Named parameters the TASK_FILTERS clauses refer to"""
+        day_start, day_end = day_bounds(day or datetime.date.today())
+        return {"now": int(time.time()), "day_start": day_start, "day_end": day_end}
+
+    def snapshot(self, connection, table, row_id):
+        """Current journaled columns of one row as a dict, or None if it does not exist"""
+        columns = JOURNAL_TABLES[table]
+        row = connection.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id=?",
+                                 (row_id,)).fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def record(self, connection, action, table, row_id, before, reverts=None):
+        """Journal how a row changed since the before snapshot; call after the write"""
+        after = self.snapshot(connection, table, row_id)
+        if before is None and after is None:
+            return
+        if before is None:
+            op = "insert"
+        elif after is None:
+            op = "delete"
+        else:
+            op = "update"
+            changed = [column for column in after
+                       if column != "version" and after[column] != before[column]]
+            if not changed:
+                return
+            before = {column: before[column] for column in changed}
+            after = {column: after[column] for column in changed}
+        connection.execute('''
+            INSERT INTO todo_journal (action, table_name, row_id, op, before, after, reverts)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (action, table, row_id, op, before and json.dumps(before),
+              after and json.dumps(after), reverts))
+
+    def batch_history(self):
+        """(undo, redo) stacks as seen by the running write batch; kept only if it commits"""
+        if self.pending_history is None:
+            self.pending_history = (list(self.undo_stack), list(self.redo_stack))
+            self.db.on_batch_end(self.keep_history, self.drop_history)
+        return self.pending_history
+
+    def keep_history(self):
+        """Publish the stacks of a committed batch"""
+        self.undo_stack[:], self.redo_stack[:] = self.pending_history
+        self.pending_history = None
+
+    def drop_history(self):
+        """Forget the stack changes of a batch that was rolled back"""
+        self.pending_history = None
+
+    def journaled(self, job, undoable=True):
+        """Queue job(connection, action); its recorded changes become one undoable action"""
+        def run(connection):
+            action = connection.execute(
+                "SELECT COALESCE(MAX(action), 0) + 1 FROM todo_journal").fetchone()[0]
+            result = job(connection, action)
+            if undoable and connection.execute(
+                    "SELECT 1 FROM todo_journal WHERE action=? LIMIT 1", (action,)).fetchone():
+                undo_stack, redo_stack = self.batch_history()
+                undo_stack.append(action)
+                del undo_stack[:-UNDO_LIMIT]
+                redo_stack.clear()
+            return result
+        return self.db.submit(run)
+
+    def revert(self, connection, action, new_action):
+        """Apply the inverse of every change in action, journaled as new_action"""
+        entries = connection.execute('''
+            SELECT table_name, row_id, op, before FROM todo_journal
+            WHERE action=? ORDER BY seq DESC
+        ''', (action,)).fetchall()
+        task_ids = []
+        for table, row_id, op, before in entries:
+            current = self.snapshot(connection, table, row_id)
+            # Restored todos rows get a fresh version so cached display rows are not reused
+            bump = ", version = version + 1" if table == "todos" else ""
+            if op == "insert":
+                connection.execute(f"DELETE FROM {table} WHERE id=?", (row_id,))
+            elif op == "delete":
+                values = json.loads(before)
+                if bump:
+                    values["version"] = (values.get("version") or 0) + 1
+                connection.execute(f"INSERT INTO {table} ({', '.join(values)}) "
+                                   f"VALUES ({', '.join('?' * len(values))})", list(values.values()))
+            else:
+                values = json.loads(before)
+                assignments = ", ".join(f"{column}=?" for column in values)
+                connection.execute(f"UPDATE {table} SET {assignments}{bump} WHERE id=?",
+                                   list(values.values()) + [row_id])
+            self.record(connection, new_action, table, row_id, current, reverts=action)
+            if table == "todos" and row_id not in task_ids:
+                task_ids.append(row_id)
+        return task_ids
+
+    def undo(self):
+        """Queue undoing this session's latest action; the Future yields touched task ids"""
+        return self.revert_latest(redo=False)
+
+    def redo(self):
+        """Queue redoing the latest undone action; the Future yields touched task ids"""
+        return self.revert_latest(redo=True)
+
+    def revert_latest(self, redo):
+        """Revert the top action of one stack and push the compensating action on the other"""
+        def job(connection):
+            undo_stack, redo_stack = self.batch_history()
+            source, target = (redo_stack, undo_stack) if redo else (undo_stack, redo_stack)
+            if not source:
+                return []
+            new_action = connection.execute(
+                "SELECT COALESCE(MAX(action), 0) + 1 FROM todo_journal").fetchone()[0]
+            task_ids = self.revert(connection, source[-1], new_action)
+            if not connection.execute("SELECT 1 FROM todo_journal WHERE action=? LIMIT 1",
+                                      (new_action,)).fetchone():
+                # Every row it touched was archived or changed back meanwhile
+                raise ValueError("Nothing left to revert: the tasks of that change were "
+                                 "archived or already restored.")
+            # Only pop once the revert went through; the batch publishes the stacks on commit
+            source.pop()
+            target.append(new_action)
+            return task_ids
+        return self.db.submit(job)
+
+    def journal_since(self, seq, chunk_size=1000):
+        """Stream journal entries after seq as dicts, oldest first, for incremental sync"""
+        cursor = self.db.reader().execute('''
+            SELECT seq, action, table_name, row_id, op, before, after, reverts, created_at
+            FROM todo_journal WHERE seq > ? ORDER BY seq
+        ''', (seq,))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for seq, action, table, row_id, op, before, after, reverts, created_at in rows:
+                yield {"seq": seq, "action": action, "table": table, "id": row_id, "op": op,
+                       "before": json.loads(before) if before else None,
+                       "after": json.loads(after) if after else None,
+                       "reverts": reverts, "created_at": created_at}
+
+    def filter_sql(self, filter_type, extra="", day=None):
+        """WHERE clause and parameters for a filter plus an optional extra condition"""
+        where, keys = TASK_FILTERS[filter_type]
+        conditions = [f"({clause})" for clause in (where, extra) if clause]
+        sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return sql, self.filter_params(day)
+
+    def list_tasks(self, filter_type="All", day=None):
+        """Return task rows for one of the TASK_FILTERS"""
+        where, params = self.filter_sql(filter_type, day=day)
+        keys = TASK_FILTERS[filter_type][1]
+        return self.query(f"{SELECT_TASKS}{where} ORDER BY {order_clause(keys)}", params)
+
+    @perf_monitor.timed("db.page_tasks")
+    def page_tasks(self, filter_type, after=None, before=None, offset=0, limit=100, day=None):
+        """Return one page of a filter, resuming after or before a known row if given"""
+        keys = TASK_FILTERS[filter_type][1]
+        anchor = before or after
+        extra, key_params = keyset_clause(keys, anchor, before=bool(before)) if anchor else ("", {})
+        where, params = self.filter_sql(filter_type, extra, day)
+        params.update(key_params, limit=limit, offset=offset)
+        rows = self.query(f"{SELECT_TASKS}{where} ORDER BY {order_clause(keys, bool(before))} "
+                          f"LIMIT :limit OFFSET :offset", params)
+        return rows[::-1] if before else rows
+
+    @perf_monitor.timed("db.count_tasks")
+    def count_tasks(self, filter_type="All", day=None):
+        """Count the rows a filter matches"""
+        where, params = self.filter_sql(filter_type, day=day)
+        return self.query(f"SELECT COUNT(*) FROM todos{where}", params)[0][0]
+
+    @perf_monitor.timed("db.count_before")
+    def count_before(self, filter_type, row, day=None):
+        """Position of row within a filter: how many matching rows sort ahead of it"""
+        extra, key_params = keyset_clause(TASK_FILTERS[filter_type][1], row, before=True)
+        where, params = self.filter_sql(filter_type, extra, day)
+        params.update(key_params)
+        return self.query(f"SELECT COUNT(*) FROM todos{where}", params)[0][0]
+
+    @perf_monitor.timed("db.get_filtered_task")
+    def get_filtered_task(self, filter_type, task_id, day=None):
+        """Return a task row if it currently matches the filter, else None"""
+        where, params = self.filter_sql(filter_type, "id = :task_id", day)
+        params["task_id"] = task_id
+        rows = self.query(f"{SELECT_TASKS}{where}", params)
+        return rows[0] if rows else None
+
+    def tasks_due_between(self, start_ts, end_ts, status='Pending'):
+        """Return tasks with a given status whose due_ts falls in [start_ts, end_ts]"""
+        return self.query(f"{SELECT_TASKS} WHERE status=? AND due_ts BETWEEN ? AND ? ORDER BY due_ts",
+                          (status, start_ts, end_ts))
+
+    def due_within(self, seconds):
+        """Return pending tasks due in the next number of seconds"""
+        now = int(time.time())
+        return self.tasks_due_between(now, now + seconds)
+
+    @perf_monitor.timed("db.search_tasks")
+    def search_tasks(self, text, filter_type="All", limit=500, day=None):
+        """Return filter rows whose description matches every word prefix, best BM25 first"""
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+        where, params = self.filter_sql(filter_type, "todos_fts MATCH :match", day)
+        params.update(match=" ".join(f'"{word}"*' for word in words), limit=limit)
+        columns = ", ".join(f"todos.{column}" for column in TASK_COLUMNS)
+        return self.query(f'''
+            SELECT {columns} FROM todos_fts JOIN todos ON todos.id = todos_fts.rowid
+            {where} ORDER BY bm25(todos_fts), todos.id LIMIT :limit
+        ''', params)
+
+    @perf_monitor.timed("db.get_task")
+    def get_task(self, task_id):
+        """Return a single task row or None"""
+        rows = self.query(f"{SELECT_TASKS} WHERE id=?", (task_id,))
+        return rows[0] if rows else None
+
+    def add_task(self, task, due_date, due_time, priority, reminder, week_day):
+        """Queue an insert; the Future yields the new task id"""
+        def job(connection, action):
+            cursor = connection.execute('''
+                INSERT INTO todos (task, due_date, due_time, due_ts, priority, priority_rank,
+                                   reminder_enabled, week_day)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (task, due_date, due_time, parse_due(due_date, due_time), priority,
+                  PRIORITY_RANKS.get(priority, 0), reminder, week_day))
+            self.record(connection, action, "todos", cursor.lastrowid, None)
+            return cursor.lastrowid
+        return self.journaled(job)
+
+    def update_task(self, task_id, task, due_date, due_time, priority, reminder, week_day):
+        """Overwrite the editable fields of a task; the Future yields its id"""
+        def job(connection, action):
+            before = self.snapshot(connection, "todos", task_id)
+            connection.execute('''
+                UPDATE todos SET version=version+1, task=?, due_date=?, due_time=?, due_ts=?,
+                priority=?, priority_rank=?, reminder_enabled=?, week_day=? WHERE id=?
+            ''', (task, due_date, due_time, parse_due(due_date, due_time), priority,
+                  PRIORITY_RANKS.get(priority, 0), reminder, week_day, task_id))
+            self.record(connection, action, "todos", task_id, before)
+            return task_id
+        return self.journaled(job)
+
+    def complete_task(self, task_id):
+        """Mark a task as completed; the Future yields the ids of every row touched"""
+        def job(connection, action):
+            next_ids = self.advance_series(connection, task_id, action)
+            before = self.snapshot(connection, "todos", task_id)
+            connection.execute('''
+                UPDATE todos SET status='Completed', completed_at=CURRENT_TIMESTAMP,
+                version=version+1 WHERE id=?
+            ''', (task_id,))
+            self.record(connection, action, "todos", task_id, before)
+            return [task_id] + next_ids
+        return self.journaled(job)
+
+    def delete_task(self, task_id):
+        """Remove a task; a series moves on to its next occurrence. Yields touched ids"""
+        def job(connection, action):
+            next_ids = self.advance_series(connection, task_id, action)
+            before = self.snapshot(connection, "todos", task_id)
+            connection.execute("DELETE FROM todos WHERE id=?", (task_id,))
+            self.record(connection, action, "todos", task_id, before)
+            return [task_id] + next_ids
+        return self.journaled(job)
+
+    def add_series(self, task, start_date, due_time, priority, reminder, frequency,
+                   interval_days=1, weekdays=(), month_day=None, end_date=None):
+        """Queue a new recurring series; the Future yields its first occurrence's id"""
+        def job(connection, action):
+            cursor = connection.execute('''
+                INSERT INTO task_series (task, due_time, priority, reminder_enabled, frequency,
+                                         interval_days, weekdays, month_day, start_date, end_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (task, due_time, priority, reminder, frequency, interval_days,
+                  ",".join(str(day) for day in weekdays), month_day, start_date, end_date))
+            self.record(connection, action, "task_series", cursor.lastrowid, None)
+            yesterday = datetime.date.today() - datetime.timedelta(days=1)
+            return self.materialize_next(connection, cursor.lastrowid, yesterday, action)
+        return self.journaled(job)
+
+    def end_series(self, series_id):
+        """Stop a series and drop its pending occurrence; the Future yields removed ids"""
+        def job(connection, action):
+            ids = [row[0] for row in connection.execute(
+                "SELECT id FROM todos WHERE series_id=? AND status='Pending'", (series_id,))]
+            kept = [row[0] for row in connection.execute(
+                "SELECT id FROM todos WHERE series_id=? AND status<>'Pending'", (series_id,))]
+            before = {task_id: self.snapshot(connection, "todos", task_id) for task_id in ids + kept}
+            series = self.snapshot(connection, "task_series", series_id)
+            connection.execute("DELETE FROM todos WHERE series_id=? AND status='Pending'", (series_id,))
+            connection.execute("UPDATE todos SET series_id=NULL, version=version+1 WHERE series_id=?",
+                               (series_id,))
+            connection.execute("DELETE FROM task_series WHERE id=?", (series_id,))
+            for task_id, row in before.items():
+                self.record(connection, action, "todos", task_id, row)
+            self.record(connection, action, "task_series", series_id, series)
+            return ids
+        return self.journaled(job)
+
+    def advance_series(self, connection, task_id, action):
+        """Before a series' live occurrence is finished, materialize only the next one"""
+        # Only the pending, latest occurrence moves the series on; finishing an older or
+        # already completed row must not bring back occurrences that were skipped
+        row = connection.execute('''
+            SELECT series_id, occurrence_date FROM todos WHERE id=? AND status='Pending'
+            AND occurrence_date = (SELECT MAX(occurrence_date) FROM todos AS occurrence
+                                   WHERE occurrence.series_id = todos.series_id)
+        ''', (task_id,)).fetchone()
+        if not row:
+            return []
+        # Missed occurrences are skipped rather than back-filled
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        after = max(datetime.date.fromisoformat(row[1]), yesterday)
+        next_id = self.materialize_next(connection, row[0], after, action)
+        return [next_id] if next_id else []
+
+    def materialize_next(self, connection, series_id, after, action):
+        """Insert the first occurrence of a series after a date; returns its id or None"""
+        series = connection.execute('''
+            SELECT task, due_time, priority, reminder_enabled, frequency, start_date,
+                   interval_days, weekdays, month_day, end_date
+            FROM task_series WHERE id=?
+        ''', (series_id,)).fetchone()
+        if not series:
+            return None
+        task, due_time, priority, reminder = series[:4]
+        day = RecurrenceRule.from_series(*series[4:]).next_after(after)
+        if day is None:
+            return None
+        due_date = day.isoformat()
+        cursor = connection.execute('''
+            INSERT OR IGNORE INTO todos (task, due_date, due_time, due_ts, priority, priority_rank,
+                                         reminder_enabled, week_day, series_id, occurrence_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (task, due_date, due_time, parse_due(due_date, due_time), priority,
+              PRIORITY_RANKS.get(priority, 0), reminder, day.strftime("%A"), series_id, due_date))
+        if cursor.rowcount:
+            self.record(connection, action, "todos", cursor.lastrowid, None)
+        return connection.execute("SELECT id FROM todos WHERE series_id=? AND occurrence_date=?",
+                                  (series_id, due_date)).fetchone()[0]
+
+    def roll_series_forward(self, day=None):
+        """Queue moving live occurrences missed before day to their series' next date"""
+        # A pending occurrence nobody completed would otherwise hold its series, and its
+        # reminders, in the past forever; the Future yields the ids of the moved rows
+        def job(connection, action):
+            today = day or datetime.date.today()
+            rows = connection.execute('''
+                SELECT todos.id, todos.due_time, task_series.reminder_enabled,
+                       frequency, start_date, interval_days, weekdays, month_day, end_date
+                FROM todos JOIN task_series ON task_series.id = todos.series_id
+                WHERE todos.status='Pending' AND todos.occurrence_date < ?
+                AND todos.occurrence_date = (SELECT MAX(occurrence_date) FROM todos AS occurrence
+                                             WHERE occurrence.series_id = todos.series_id)
+            ''', (today.isoformat(),)).fetchall()
+            moved = []
+            for task_id, due_time, reminder, *rule in rows:
+                next_day = RecurrenceRule.from_series(*rule).next_after(today - datetime.timedelta(days=1))
+                if next_day is None:
+                    continue  # The series has ended; the missed row stays overdue
+                due_date = next_day.isoformat()
+                before = self.snapshot(connection, "todos", task_id)
+                connection.execute('''
+                    UPDATE todos SET due_date=?, due_ts=?, week_day=?, occurrence_date=?,
+                    reminder_enabled=?, version=version+1 WHERE id=?
+                ''', (due_date, parse_due(due_date, due_time), next_day.strftime("%A"), due_date,
+                      reminder, task_id))
+                self.record(connection, action, "todos", task_id, before)
+                moved.append(task_id)
+            return moved
+        return self.journaled(job, undoable=False)
+
+    def get_series_rule(self, series_id):
+        """Return the RecurrenceRule of a series, or None if it no longer exists"""
+        rows = self.query('''
+            SELECT frequency, interval_days, weekdays, month_day, start_date, end_date
+            FROM task_series WHERE id=?
+        ''', (series_id,))
+        if not rows:
+            return None
+        frequency, interval_days, weekdays, month_day, start_date, end_date = rows[0]
+        return RecurrenceRule.from_series(frequency, start_date, interval_days, weekdays,
+                                          month_day, end_date)
+
+    def month_load(self, year, month):
+        """Pending task count per due date of one month, as {'YYYY-MM-DD': count}"""
+        rows = self.query('''
+            SELECT due_date, COUNT(*) FROM todos
+            WHERE status = 'Pending' AND due_date BETWEEN ? AND ?
+            GROUP BY due_date
+        ''', (f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-31"))
+        load = dict(rows)
+        # Series keep one live row; their later occurrences count as load too
+        first = datetime.date(year, month, 1)
+        last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        for _, _, day, _ in self.expand_series(first, last):
+            load[day.isoformat()] = load.get(day.isoformat(), 0) + 1
+        return load
+
+    def stats(self, day=None):
+        """Dashboard numbers read from todo_stats, independent of the task count"""
+        day = day or datetime.date.today()
+        rows = self.query("SELECT key, count FROM todo_stats WHERE bucket = ?", ("status",))
+        stats = {"status": {key: count for key, count in rows if count}}
+        rows = self.query("SELECT key, count FROM todo_stats WHERE bucket = ?", ("priority",))
+        stats["priority"] = {key: count for key, count in rows if count}
+
+        today = day.isoformat()
+        rows = self.query("SELECT count FROM todo_stats WHERE bucket = 'due' AND key = ?", (today,))
+        stats["due_today"] = rows[0][0] if rows else 0
+        # Earlier days come from the summary; only today's tasks need the clock
+        day_start, _ = day_bounds(day)
+        stats["overdue"] = self.query('''
+            SELECT (SELECT COALESCE(SUM(count), 0) FROM todo_stats WHERE bucket = 'due' AND key < ?)
+                 + (SELECT COUNT(*) FROM todos WHERE status = 'Pending'
+                    AND due_ts BETWEEN ? AND ?)
+        ''', (today, day_start, int(time.time()) - 1))[0][0]
+
+        first = (day - datetime.timedelta(days=STATS_HISTORY_DAYS - 1)).isoformat()
+        stats["completed"] = dict(self.query('''
+            SELECT key, count FROM todo_stats WHERE bucket = 'completed' AND key BETWEEN ? AND ?
+            AND count > 0 ORDER BY key
+        ''', (first, today)))
+        return stats
+
+    def rebuild_stats(self):
+        """Recompute todo_stats in one transaction, e.g. after editing the file by hand"""
+        def job(connection):
+            for sql in REBUILD_STATS:
+                connection.execute(sql)
+        return self.db.submit(job)
+
+    def data_version(self):
+        """Counter that moves whenever another connection commits to the database"""
+        return self.query("PRAGMA data_version")[0][0]
+
+    def last_change(self):
+        """Sequence number of the newest change-log entry, 0 if there is none"""
+        return self.query("SELECT COALESCE(MAX(seq), 0) FROM todo_changes")[0][0]
+
+    def changes_since(self, seq, limit=100):
+        """Return (newest seq, ids of tasks changed after seq), ids None if a reload is cheaper"""
+        rows = self.query("SELECT seq, task_id FROM todo_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                          (seq, limit + 1))
+        if not rows:
+            return seq, []
+        # Too many changes, or entries already pruned past what the caller has seen
+        if len(rows) > limit or rows[0][0] > seq + 1:
+            return self.last_change(), None
+        return rows[-1][0], list(dict.fromkeys(task_id for _, task_id in rows))
+
+    def archive_batch(self, cutoff, batch_size=500):
+        """Queue moving up to batch_size tasks completed before cutoff; yields the count"""
+        columns = ", ".join(ARCHIVE_COLUMNS)
+        json_columns = ", ".join(f"'{column}', {column}" for column in ARCHIVE_COLUMNS)
+
+        def job(connection, action):
+            ids = [row[0] for row in connection.execute('''
+                SELECT id FROM todos WHERE status='Completed' AND completed_at < ?
+                ORDER BY completed_at LIMIT ?
+            ''', (cutoff, batch_size))]
+            if len(ids) < batch_size:
+                # Completed before completed_at existed: go by creation time instead
+                ids += [row[0] for row in connection.execute('''
+                    SELECT id FROM todos WHERE status='Completed' AND completed_at IS NULL
+                    AND created_at < ? LIMIT ?
+                ''', (cutoff, batch_size - len(ids)))]
+            if ids:
+                marks = ", ".join("?" * len(ids))
+                connection.execute(f"INSERT INTO todos_archive ({columns}) "
+                                   f"SELECT {columns} FROM todos WHERE id IN ({marks})", ids)
+                # Journaled so journal_since consumers see the rows leave todos
+                connection.execute(f'''
+                    INSERT INTO todo_journal (action, table_name, row_id, op, before)
+                    SELECT ?, 'todos', id, 'archive', json_object({json_columns})
+                    FROM todos WHERE id IN ({marks})
+                ''', [action] + ids)
+                connection.execute(f"DELETE FROM todos WHERE id IN ({marks})", ids)
+            return len(ids)
+        return self.journaled(job, undoable=False)
+
+    def archive_completed(self, days=ARCHIVE_AFTER_DAYS, batch_size=500):
+        """Archive old completed tasks batch by batch and return how many moved; blocks"""
+        # completed_at is CURRENT_TIMESTAMP text, i.e. UTC
+        cutoff = (datetime.datetime.now(datetime.timezone.utc)
+                  - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        total = 0
+        # One job per batch, so other writes get in between and no transaction grows large
+        while True:
+            moved = self.archive_batch(cutoff, batch_size).result()
+            total += moved
+            if moved < batch_size:
+                return total
+
+    def search_archive(self, text="", limit=500):
+        """Archived tasks matching every word prefix, or the latest archived ones"""
+        columns = ", ".join(f"todos_archive.{column}" for column in TASK_COLUMNS)
+        words = re.findall(r"\w+", text)
+        if not words:
+            return self.query(f"SELECT {columns} FROM todos_archive "
+                              f"ORDER BY archived_at DESC, id DESC LIMIT ?", (limit,))
+        return self.query(f'''
+            SELECT {columns} FROM todos_archive_fts
+            JOIN todos_archive ON todos_archive.id = todos_archive_fts.rowid
+            WHERE todos_archive_fts MATCH ? ORDER BY bm25(todos_archive_fts), todos_archive.id
+            LIMIT ?
+        ''', (" ".join(f'"{word}"*' for word in words), limit))
+
+    def expand_series(self, first, last):
+        """(series_id, task, date, due_time) of occurrences in a window not yet materialized as rows"""
+        series = self.query('''
+            SELECT id, task, due_time,
+                   (SELECT MAX(occurrence_date) FROM todos WHERE series_id = task_series.id),
+                   frequency, start_date, interval_days, weekdays, month_day, end_date
+            FROM task_series WHERE start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+        ''', (last.isoformat(), first.isoformat()))
+        occurrences = []
+        for series_id, task, due_time, materialized, *rule in series:
+            # The live row already covers everything up to its own occurrence date
+            start = first
+            if materialized:
+                start = max(first, datetime.date.fromisoformat(materialized) + datetime.timedelta(days=1))
+            for day in RecurrenceRule.from_series(*rule).occurrences(start, last):
+                occurrences.append((series_id, task, day, due_time))
+        return occurrences
+
+    def import_rows(self, chunks, result=None):
+        """Queue a single-transaction insert of validated row chunks"""
+        # Rows are (task, due_date, due_time, priority, status, reminder, week_day, created_at);
+        # the Future yields the inserted count unless a result is given
+        columns = ", ".join(f"'{column}', {column}" for column in ARCHIVE_COLUMNS)
+
+        def job(connection, action):
+            first_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM todos").fetchone()[0]
+            total = 0
+            for rows in chunks:
+                connection.executemany('''
+                    INSERT INTO todos (task, due_date, due_time, due_ts, priority, priority_rank,
+                                       status, reminder_enabled, week_day, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                ''', [(task, due_date, due_time, parse_due(due_date, due_time), priority,
+                       PRIORITY_RANKS.get(priority, 0), status, reminder, week_day, created_at)
+                      for task, due_date, due_time, priority, status, reminder, week_day, created_at
+                      in rows])
+                total += len(rows)
+            # Journaled in one statement; AUTOINCREMENT ids only grow, so the new rows follow first_id
+            connection.execute(f'''
+                INSERT INTO todo_journal (action, table_name, row_id, op, after)
+                SELECT ?, 'todos', id, 'insert', json_object({columns}) FROM todos WHERE id > ?
+            ''', (action, first_id))
+            return total if result is None else result
+        return self.journaled(job, undoable=False)
+
+    def iter_tasks(self, columns=TASK_COLUMNS, chunk_size=1000):
+        """Stream task rows in id order without holding the table in memory"""
+        cursor = self.db.reader().execute(f"SELECT {', '.join(columns)} FROM todos ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+    @perf_monitor.timed("db.reminder_candidates")
+    def reminder_candidates(self):
+        """Return (id, task, due_date, due_time, due_ts) for pending reminders not yet due"""
+        return self.query('''
+            SELECT id, task, due_date, due_time, due_ts FROM todos
+            WHERE reminder_enabled=1 AND status='Pending'
+            AND due_ts >= ? ORDER BY due_ts
+        ''', (int(time.time()),))
+
+    def get_reminder(self, task_id):
+        """Return the reminder row for one task, or None if it needs no reminder"""
+        rows = self.query('''
+            SELECT id, task, due_date, due_time, due_ts FROM todos
+            WHERE id=? AND reminder_enabled=1 AND status='Pending'
+        ''', (task_id,))
+        return rows[0] if rows else None
+
+    def disable_reminder(self, task_id):
+        """Turn off the reminder once it has been shown"""
+        def job(connection, action):
+            before = self.snapshot(connection, "todos", task_id)
+            connection.execute("UPDATE todos SET reminder_enabled=0, version=version+1 WHERE id=?",
+                               (task_id,))
+            self.record(connection, action, "todos", task_id, before)
+            return task_id
+        return self.journaled(job, undoable=False)
+
+    def release_reader(self):
+        """Close the calling thread's reader connection"""
+        self.db.release_reader()
+
+    def close(self):
+        """Flush pending writes and close all connections"""
+        self.db.close()
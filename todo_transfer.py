@@ -0,0 +1,117 @@
+import csv
+import json
+import datetime
+
+from bulk_import import new_report, validated_chunks
+from todo_store import PRIORITY_RANKS
+
+# Columns exchanged with CSV / JSON Lines files, in file order
+TRANSFER_FIELDS = ("task", "due_date", "due_time", "priority", "status",
+                   "reminder_enabled", "created_at")
+TASK_STATUSES = ("Pending", "Completed")
+WEEK_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def file_format(path):
+    """Pick 'csv' or 'jsonl' from a file name"""
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_records(path):
+    """Stream task records from a CSV or JSON Lines file as (line, dict) pairs"""
+    with open(path, newline='', encoding='utf-8') as file:
+        if file_format(path) == "jsonl":
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as error:
+                        yield line_number, error
+        else:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def validate_record(record):
+    """Normalize one record into an insert tuple, raising ValueError when invalid"""
+    if not isinstance(record, dict):
+        raise ValueError(f"not a task record: {record}")
+
+    task = str(record.get("task") or "").strip()
+    if not task:
+        raise ValueError("task description is empty")
+
+    due_date = str(record.get("due_date") or "").strip()
+    week_day = ""
+    if due_date:
+        try:
+            if len(due_date) != 10 or due_date[4] != "-":
+                raise ValueError
+            week_day = WEEK_DAYS[datetime.date.fromisoformat(due_date).weekday()]
+        except ValueError:
+            raise ValueError(f"invalid due_date {due_date!r}, use YYYY-MM-DD")
+
+    due_time = str(record.get("due_time") or "").strip()
+    if due_time:
+        hour, _, minute = due_time.partition(":")
+        if not (hour.isdigit() and minute.isdigit() and len(minute) == 2
+                and int(hour) < 24 and int(minute) < 60):
+            raise ValueError(f"invalid due_time {due_time!r}, use HH:MM")
+        due_time = f"{int(hour):02d}:{minute}"
+
+    priority = str(record.get("priority") or "Medium").strip().capitalize()
+    if priority not in PRIORITY_RANKS:
+        raise ValueError(f"unknown priority {priority!r}")
+
+    status = str(record.get("status") or "Pending").strip().capitalize()
+    if status not in TASK_STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+
+    reminder = str(record.get("reminder_enabled") or "0").strip().lower()
+    reminder = 1 if reminder in ("1", "true", "yes") else 0
+
+    created_at = str(record.get("created_at") or "").strip()
+    if created_at:
+        try:
+            if len(created_at) < 10 or created_at[4] != "-":
+                raise ValueError
+            created = datetime.datetime.fromisoformat(created_at)
+        except ValueError:
+            raise ValueError(f"invalid created_at {created_at!r}, use YYYY-MM-DD[ HH:MM:SS]")
+        # Stored like CURRENT_TIMESTAMP, UTC text that sorts and compares in time order
+        if created.tzinfo:
+            created = created.astimezone(datetime.timezone.utc)
+        created_at = created.strftime("%Y-%m-%d %H:%M:%S")
+    return task, due_date, due_time, priority, status, reminder, week_day, created_at or None
+
+
+def import_tasks(store, path, chunk_size=1000):
+    """Queue a one-transaction import of a CSV or JSONL file; the Future yields a report"""
+    report = new_report()
+
+    def counted(chunks):
+        for rows in chunks:
+            report["imported"] += len(rows)
+            yield rows
+
+    # Reading, validation and inserts all happen lazily inside the writer job
+    chunks = validated_chunks(read_records(path), validate_record, report, chunk_size)
+    return store.import_rows(counted(chunks), result=report)
+
+
+def export_tasks(store, path):
+    """Stream every task into a CSV or JSONL file and return the row count"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        if file_format(path) == "jsonl":
+            for row in store.iter_tasks(TRANSFER_FIELDS):
+                file.write(json.dumps(dict(zip(TRANSFER_FIELDS, row)), ensure_ascii=False) + "\n")
+                count += 1
+        else:
+            writer = csv.writer(file)
+            writer.writerow(TRANSFER_FIELDS)
+            for row in store.iter_tasks(TRANSFER_FIELDS):
+                writer.writerow(row)
+                count += 1
+    return count
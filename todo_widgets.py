@@ -0,0 +1,402 @@
+import tkinter as tk
+from tkinter import messagebox
+import difflib
+import calendar
+import datetime
+
+import perf_monitor
+from todo_store import STATS_HISTORY_DAYS, TASK_COLUMNS, TASK_FILTERS, sorts_before
+
+
+# Cell backgrounds by pending-task count: none, 1, 2, 3-4, 5 or more
+HEAT_SHADES = ('#f8f9fa', '#d4edda', '#ffe8a1', '#ffc107', '#f5a05a')
+HEAT_LIMITS = (0, 1, 2, 4)
+
+
+def heat_shade(count):
+    """Background colour for a day with count pending tasks"""
+    for shade, limit in zip(HEAT_SHADES, HEAT_LIMITS):
+        if count <= limit:
+            return shade
+    return HEAT_SHADES[-1]
+
+
+class VirtualTaskList:
+    """Listbox that only materializes the task rows around its viewport"""
+
+    def __init__(self, parent, store, format_row, buffer_rows=50, listbox_class=tk.Listbox,
+                 scrollbar_class=tk.Scrollbar, **listbox_options):
+        self.store = store
+        self.format_row = format_row
+        self.buffer_rows = buffer_rows
+        self.filter_type = "All"
+        self.search_text = ""
+        self.archived = False   # browse todos_archive instead of the live table
+
+        self.total = 0          # rows the filter matches
+        self.top = 0            # filter position of the first visible row
+        self.window = []        # cached rows, contiguous in filter order
+        self.window_start = 0   # filter position of window[0]
+        self.shown = []         # (task id, text) currently in the listbox
+        self.applied = {}       # task id -> filter row as of its last apply_change
+
+        # The widget classes can be swapped, e.g. for display-less stand-ins in benchmarks
+        self.listbox = listbox_class(parent, **listbox_options)
+        self.scrollbar = scrollbar_class(parent, orient='vertical', command=self.on_scrollbar)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox.bind('<Configure>', lambda event: self.render())
+        self.listbox.bind('<MouseWheel>', lambda event: self.scroll_by(-1 if event.delta > 0 else 1, 'units'))
+        self.listbox.bind('<Button-4>', lambda event: self.scroll_by(-1, 'units'))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll_by(1, 'units'))
+        self.listbox.bind('<Up>', lambda event: self.step_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self.step_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self.scroll_by(-1, 'pages'))
+        self.listbox.bind('<Next>', lambda event: self.scroll_by(1, 'pages'))
+
+    def visible_rows(self):
+        """Number of rows that fit in the listbox right now"""
+        height = self.listbox.winfo_height()
+        bbox = self.listbox.bbox(0)
+        row_height = bbox[3] + 1 if bbox else 16
+        return max(1, height // row_height) if height > 1 else int(self.listbox.cget('height'))
+
+    def set_filter(self, filter_type):
+        """Switch to another filter and show it from the top"""
+        self.filter_type = filter_type
+        self.top = 0
+        self.reload()
+
+    def set_search(self, text):
+        """Show ranked full-text matches within the filter; empty text ends the search"""
+        self.search_text = text.strip()
+        self.top = 0
+        self.reload()
+
+    def set_archived(self, archived):
+        """Switch between live tasks and the archive of old completed ones"""
+        self.archived = archived
+        self.top = 0
+        self.reload()
+
+    @perf_monitor.timed("ui.task_list.reload")
+    def reload(self):
+        """Drop cached rows and fetch the current viewport again"""
+        self.applied = {}
+        if self.archived:
+            # Like search results, the archive view is capped and held whole
+            self.window = self.store.search_archive(self.search_text)
+            self.window_start = 0
+            self.total = len(self.window)
+        elif self.search_text:
+            # Search results are capped, so they are held whole in rank order
+            self.window = self.store.search_tasks(self.search_text, self.filter_type)
+            self.window_start = 0
+            self.total = len(self.window)
+        else:
+            self.total = self.store.count_tasks(self.filter_type)
+            self.window = []
+            self.window_start = self.top
+        self.render()
+
+    def task_id_at(self, index):
+        """Task id behind a listbox row index"""
+        return self.shown[index][0]
+
+    def load(self, start, end):
+        """Make sure rows [start, end) are in the window, fetching as little as possible"""
+        if self.search_text or self.archived:
+            return
+        start, end = max(0, start), min(self.total, end)
+        window_end = self.window_start + len(self.window)
+        if start >= end or (self.window_start <= start and end <= window_end):
+            return
+
+        if self.window and self.window_start <= start <= window_end:
+            # Scrolling down: continue after the last cached row
+            more = self.store.page_tasks(self.filter_type, after=self.window[-1],
+                                         limit=end - window_end + self.buffer_rows)
+            self.window.extend(more)
+        elif self.window and start < self.window_start <= end <= window_end:
+            # Scrolling up: continue before the first cached row
+            count = min(self.window_start, self.window_start - start + self.buffer_rows)
+            more = self.store.page_tasks(self.filter_type, before=self.window[0], limit=count)
+            self.window[:0] = more
+            self.window_start -= len(more)
+        else:
+            # A jump (scrollbar drag, filter change) can only be served by offset
+            self.window_start = max(0, start - self.buffer_rows)
+            self.window = self.store.page_tasks(self.filter_type, offset=self.window_start,
+                                                limit=end - self.window_start + self.buffer_rows)
+
+        # Keep the cache bounded to a few buffers around the viewport
+        keep_start = max(self.window_start, start - 2 * self.buffer_rows)
+        keep_end = min(self.window_start + len(self.window), end + 2 * self.buffer_rows)
+        self.window = self.window[keep_start - self.window_start:keep_end - self.window_start]
+        self.window_start = keep_start
+
+    @perf_monitor.timed("ui.task_list.render")
+    def render(self):
+        """Show rows top..top+visible, touching only the listbox lines that changed"""
+        visible = self.visible_rows()
+        self.top = max(0, min(self.top, self.total - visible))
+        self.load(self.top, self.top + visible)
+
+        offset = self.top - self.window_start
+        rows = self.window[offset:offset + visible]
+        wanted = [(row[0], self.format_row(row)) for row in rows]
+
+        matcher = difflib.SequenceMatcher(a=self.shown, b=wanted, autojunk=False)
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag == 'equal':
+                continue
+            if i2 > i1:
+                self.listbox.delete(i1, i2 - 1)
+            if j2 > j1:
+                self.listbox.insert(i1, *[text for _, text in wanted[j1:j2]])
+        self.shown = wanted
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Translate scrollbar commands into a new top row"""
+        if action == 'moveto':
+            self.top = int(float(amount) * self.total)
+            self.render()
+        else:
+            self.scroll_by(int(amount), unit)
+
+    def scroll_by(self, amount, unit):
+        """Scroll by a number of rows or pages"""
+        step = self.visible_rows() if unit == 'pages' else 1
+        self.top += amount * step
+        self.render()
+        return 'break'
+
+    def step_selection(self, direction):
+        """Arrow keys move the selection and scroll at the viewport edges"""
+        selection = self.listbox.curselection()
+        index = selection[0] + direction if selection else 0
+        if index < 0 or index >= len(self.shown):
+            before = self.top
+            self.scroll_by(direction, 'units')
+            index = max(0, min(len(self.shown) - 1, index - (self.top - before)))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.event_generate('<<ListboxSelect>>')
+        return 'break'
+
+    @perf_monitor.timed("ui.task_list.apply_change")
+    def apply_change(self, task_id):
+        """Apply an insert, update or removal of one task without a full reload"""
+        if self.search_text or self.archived:
+            self.reload()
+            return
+        row = self.store.get_filtered_task(self.filter_type, task_id)
+        if task_id in self.applied and self.applied.pop(task_id) == row:
+            # Nothing changed since, e.g. the change watcher seeing a write already applied
+            return
+        self.applied[task_id] = row
+
+        index = next((index for index, cached in enumerate(self.window) if cached[0] == task_id), None)
+        whole = self.window_start == 0 and len(self.window) == self.total
+        if index is not None:
+            was_member = True
+            del self.window[index]
+        elif whole or (row is not None and row[TASK_COLUMNS.index("version")] == 0):
+            # Every member is cached, or the row was never updated since it was inserted
+            was_member = False
+        else:
+            # Changed outside the cache, so where it was is unknown; count instead
+            self.recount(row)
+            return
+
+        self.total += (row is not None) - was_member
+        if row is not None and self.window:
+            keys = TASK_FILTERS[self.filter_type][1]
+            position = sum(1 for cached in self.window if sorts_before(keys, cached, row))
+            if 0 < position < len(self.window) or (position == 0 and self.window_start == 0) \
+                    or whole:
+                self.window.insert(position, row)
+            elif position == 0:
+                # Somewhere ahead of the cached rows, which therefore move down by one
+                self.window_start += 1
+        self.render()
+
+    def recount(self, row):
+        """Re-anchor the cache by counting, after a change to a row it does not hold"""
+        self.total = self.store.count_tasks(self.filter_type)
+        if self.window:
+            # Rows outside the cache may have moved; re-anchor on the first cached row
+            self.window_start = self.store.count_before(self.filter_type, self.window[0])
+        if row:
+            position = self.store.count_before(self.filter_type, row)
+            if not self.window:
+                self.window_start = position
+                self.window = [row]
+            elif self.window_start <= position <= self.window_start + len(self.window):
+                self.window.insert(position - self.window_start, row)
+        self.render()
+
+
+class CalendarPicker:
+    """Date picker popup with a fixed 7x6 day grid shaded by task load"""
+
+    def __init__(self, parent, store, on_pick, day=None):
+        self.store = store
+        self.on_pick = on_pick
+        day = day or datetime.date.today()
+        self.year, self.month = day.year, day.month
+        self.dates = [None] * 42   # date shown in each cell, None when blank
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Select Date")
+        self.window.resizable(False, False)
+        self.window.configure(bg='#ffffff')
+        self.window.transient(parent)
+        self.window.grab_set()
+
+        # Month/Year selection
+        nav_frame = tk.Frame(self.window, bg='#ffffff')
+        nav_frame.pack(pady=10)
+        tk.Button(nav_frame, text="◀", command=lambda: self.change_month(-1),
+                  bg='#e0e0e0').pack(side='left')
+        self.month_label = tk.Label(nav_frame, font=('Arial', 12, 'bold'), bg='#ffffff', width=16)
+        self.month_label.pack(side='left', padx=20)
+        tk.Button(nav_frame, text="▶", command=lambda: self.change_month(1),
+                  bg='#e0e0e0').pack(side='left')
+
+        # Day headers and the 42 day cells are built once and only reconfigured
+        grid = tk.Frame(self.window, bg='#ffffff')
+        grid.pack(padx=10, pady=(0, 10))
+        for column, name in enumerate(calendar.day_abbr):
+            tk.Label(grid, text=name, font=('Arial', 10, 'bold'), bg='#e9ecef',
+                     width=4, height=1).grid(row=0, column=column, padx=1, pady=1)
+        self.cells = []
+        for index in range(42):
+            cell = tk.Button(grid, width=4, height=2, relief='solid', bd=1,
+                             command=lambda index=index: self.pick(index))
+            cell.grid(row=index // 7 + 1, column=index % 7, padx=1, pady=1)
+            self.cells.append(cell)
+
+        self.show_month()
+
+    def change_month(self, direction):
+        """Step to the previous or next month"""
+        self.year, self.month = divmod(self.year * 12 + self.month - 1 + direction, 12)
+        self.month += 1
+        self.show_month()
+
+    @perf_monitor.timed("ui.calendar.show_month")
+    def show_month(self):
+        """Reconfigure the grid for the current month from one aggregate query"""
+        self.month_label.config(text=f"{calendar.month_name[self.month]} {self.year}")
+        load = self.store.month_load(self.year, self.month)
+        today = datetime.date.today()
+        first = datetime.date(self.year, self.month, 1)
+        start = first - datetime.timedelta(days=first.weekday())
+
+        for index, cell in enumerate(self.cells):
+            day = start + datetime.timedelta(days=index)
+            if day.month != self.month:
+                self.dates[index] = None
+                cell.config(text="", state='disabled', bg='#ffffff', relief='flat')
+                continue
+            self.dates[index] = day
+            count = load.get(day.isoformat(), 0)
+            text = f"{day.day}\n{count}" if count else str(day.day)
+            if day == today:
+                cell.config(text=text, state='normal', relief='solid', bg='#007bff', fg='white',
+                            font=('Arial', 10, 'bold'))
+            else:
+                cell.config(text=text, state='normal', relief='solid', bg=heat_shade(count),
+                            fg='black', font=('Arial', 9))
+
+    def pick(self, index):
+        """Hand the chosen date to the caller and close"""
+        if self.dates[index]:
+            self.on_pick(self.dates[index])
+            self.window.destroy()
+
+
+class StatsPanel:
+    """Popup dashboard of task counts read from the todo_stats summary"""
+
+    def __init__(self, parent, store):
+        self.store = store
+        self.window = tk.Toplevel(parent)
+        self.window.title("Task Statistics")
+        self.window.resizable(False, False)
+        self.window.configure(bg='#ffffff')
+        self.window.transient(parent)
+
+        self.summary = tk.Label(self.window, font=('Courier', 10), bg='#ffffff', justify='left')
+        self.summary.pack(padx=15, pady=(15, 5), anchor='w')
+
+        # One bar per day of completion history, oldest on the left
+        tk.Label(self.window, text=f"Completed per day (last {STATS_HISTORY_DAYS} days)",
+                 font=('Arial', 10, 'bold'),
+                 bg='#ffffff').pack(padx=15, anchor='w')
+        self.chart = tk.Canvas(self.window, width=360, height=80, bg='#f8f9fa',
+                               highlightthickness=0)
+        self.chart.pack(padx=15, pady=5)
+
+        button_frame = tk.Frame(self.window, bg='#ffffff')
+        button_frame.pack(pady=(5, 15))
+        tk.Button(button_frame, text="🔄 Refresh", command=self.refresh,
+                  bg='#e0e0e0', relief='flat').pack(side='left', padx=5)
+        tk.Button(button_frame, text="🛠 Rebuild", command=self.rebuild,
+                  bg='#e0e0e0', relief='flat').pack(side='left', padx=5)
+        self.refresh()
+
+    @perf_monitor.timed("ui.stats.refresh")
+    def refresh(self):
+        """Re-read the summary table and redraw"""
+        stats = self.store.stats()
+        lines = [f"{'Pending:':<12}{stats['status'].get('Pending', 0):>8}",
+                 f"{'Completed:':<12}{stats['status'].get('Completed', 0):>8}",
+                 f"{'Due today:':<12}{stats['due_today']:>8}",
+                 f"{'Overdue:':<12}{stats['overdue']:>8}",
+                 "",
+                 "Pending by priority:"]
+        for priority in ("Critical", "High", "Medium", "Low"):
+            lines.append(f"  {priority + ':':<10}{stats['priority'].get(priority, 0):>8}")
+        self.summary.config(text="\n".join(lines))
+        self.draw_history(stats["completed"])
+
+    def draw_history(self, completed):
+        """Bar chart of the completed-per-day counts"""
+        self.chart.delete('all')
+        today = datetime.date.today()
+        days = [(today - datetime.timedelta(days=back)).isoformat() for back in range(STATS_HISTORY_DAYS - 1, -1, -1)]
+        peak = max(completed.values(), default=0)
+        if not peak:
+            return
+        width = int(self.chart.cget('width')) / len(days)
+        height = int(self.chart.cget('height'))
+        for index, day in enumerate(days):
+            count = completed.get(day, 0)
+            if count:
+                top = height - count * (height - 5) / peak
+                self.chart.create_rectangle(index * width, top, (index + 1) * width - 1, height,
+                                            fill='#28a745', outline='')
+
+    def rebuild(self):
+        """Recompute the summary from the task table, then redraw once it commits"""
+        future = self.store.rebuild_stats()
+        future.add_done_callback(lambda done: self.window.after(0, self.rebuilt, done))
+
+    def rebuilt(self, done):
+        """Redraw after a rebuild, or report why it failed"""
+        try:
+            done.result()
+        except Exception as error:
+            messagebox.showerror("Rebuild Error", f"Unable to rebuild statistics: {error}",
+                                 parent=self.window)
+            return
+        self.refresh()